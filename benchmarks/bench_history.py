@@ -0,0 +1,65 @@
+"""
+Micro-benchmark for the play-history aggregates.
+
+Folds N synthetic play events into PlayHistory (through the same path used
+to load the stored log at startup) and times the stats queries. A stub store
+keeps the database out of the measurement.
+
+Usage: python -m benchmarks.bench_history [--events N] [--tracks T]
+"""
+import argparse
+import random
+import time
+
+from src.history import PlayHistory, END_EOF, END_SKIP
+
+
+class StubStore:
+    """Serves synthetic events in the batches Store.iter_play_events() yields."""
+    def __init__(self, events: int, tracks: int, batch_size: int = 10000):
+        self.events = events
+        self.tracks = tracks
+        self.batch_size = batch_size
+
+    def iter_play_events(self):
+        rng = random.Random(0)
+        now = time.time()
+        for start in range(0, self.events, self.batch_size):
+            batch = []
+            for i in range(start, min(start + self.batch_size, self.events)):
+                track = f"track{int(rng.paretovariate(1.2)) % self.tracks}"
+                reason = END_SKIP if rng.random() < 0.2 else END_EOF
+                batch.append((track, now + i, now + i + 180, 180.0, reason))
+            yield batch
+
+    def append_play_events(self, events):
+        pass
+
+
+def timed(name: str, fn, repeat: int = 20):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    print(f"{name:<16} {(time.perf_counter() - t0) / repeat * 1000:>8.3f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--events", type=int, default=1_000_000)
+    parser.add_argument("--tracks", type=int, default=50_000)
+    args = parser.parse_args()
+
+    t0 = time.perf_counter()
+    history = PlayHistory(StubStore(args.events, args.tracks))
+    history.ready.wait()
+    print(f"{'load':<16} {(time.perf_counter() - t0) * 1000:>8.1f} ms for {args.events:,} events")
+
+    timed("most_played", lambda: history.most_played(20))
+    timed("recently_played", lambda: history.recently_played(20))
+    timed("skip_rate", lambda: history.skip_rate("track1"), repeat=10000)
+    timed("record", lambda: history.record("track1", 0.0, 1.0, 1.0, END_EOF), repeat=10000)
+    history.close()
+
+
+if __name__ == "__main__":
+    main()
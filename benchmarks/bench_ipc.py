@@ -0,0 +1,150 @@
+"""
+Micro-benchmark for the MPV IPC layer.
+
+Runs against a stub MPV IPC server on a Unix socket and compares blocking
+request/response commands (python_mpv_jsonipc) with the pipelined and
+batched IPCChannel. Reports commands/sec and p50/p99 latency.
+
+Usage: python -m benchmarks.bench_ipc [--count N] [--delay-ms MS]
+"""
+import argparse
+import json
+import os
+import socket
+import tempfile
+import threading
+import time
+from typing import List
+
+from python_mpv_jsonipc import MPVInter
+
+from src.ipc import IPCChannel
+
+STATUS_PROPS = ["pause", "time-pos", "duration", "media-title", "volume"]
+
+
+class StubMPVServer(threading.Thread):
+    """Minimal MPV IPC server that answers every command with success."""
+    def __init__(self, path: str, delay: float = 0.0):
+        super().__init__(daemon=True)
+        self.path = path
+        self.delay = delay
+        self.server = socket.socket(socket.AF_UNIX)
+        self.server.bind(path)
+        self.server.listen()
+
+    def run(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            threading.Thread(target=self._serve, args=(conn,), daemon=True).start()
+
+    def _serve(self, conn: socket.socket):
+        buf = b""
+        with conn:
+            while True:
+                try:
+                    chunk = conn.recv(65536)
+                except OSError:
+                    return
+                if not chunk:
+                    return
+                buf += chunk
+                *lines, buf = buf.split(b"\n")
+                replies = []
+                for line in lines:
+                    if not line:
+                        continue
+                    msg = json.loads(line)
+                    if self.delay:
+                        time.sleep(self.delay)
+                    replies.append(json.dumps({
+                        "request_id": msg.get("request_id"),
+                        "error": "success",
+                        "data": 1.0,
+                    }).encode("utf-8") + b"\n")
+                if replies:
+                    conn.sendall(b"".join(replies))
+
+    def close(self):
+        self.server.close()
+
+
+def percentile(samples: List[float], pct: float) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+def report(name: str, count: int, elapsed: float, latencies: List[float]):
+    print(f"{name:<12} {count / elapsed:>12,.0f} cmd/s   "
+          f"p50 {percentile(latencies, 0.50) * 1000:>7.3f} ms   "
+          f"p99 {percentile(latencies, 0.99) * 1000:>7.3f} ms")
+
+
+def bench_serial(path: str, count: int):
+    inter = MPVInter(path)
+    latencies = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        inter.command("get_property", "volume")
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    inter.stop()
+    report("serial", count, elapsed, latencies)
+
+
+def bench_pipelined(path: str, count: int):
+    channel = IPCChannel(path)
+    latencies = []
+    futures = []
+    start = time.perf_counter()
+    for _ in range(count):
+        t0 = time.perf_counter()
+        future = channel.submit("get_property", "volume")
+        future.add_done_callback(lambda f, t0=t0: latencies.append(time.perf_counter() - t0))
+        futures.append(future)
+    for future in futures:
+        future.result(timeout=30)
+    elapsed = time.perf_counter() - start
+    channel.close()
+    report("pipelined", count, elapsed, latencies)
+
+
+def bench_batched(path: str, count: int):
+    channel = IPCChannel(path)
+    latencies = []
+    rounds = max(1, count // len(STATUS_PROPS))
+    start = time.perf_counter()
+    for _ in range(rounds):
+        t0 = time.perf_counter()
+        channel.get_properties(STATUS_PROPS)
+        latencies.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    channel.close()
+    report("batched x5", rounds * len(STATUS_PROPS), elapsed, latencies)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=20000)
+    parser.add_argument("--delay-ms", type=float, default=0.0,
+                        help="Simulated per-command processing time in the stub server")
+    args = parser.parse_args()
+
+    path = os.path.join(tempfile.gettempdir(), f"ytbeats-bench-{os.getpid()}.sock")
+    server = StubMPVServer(path, delay=args.delay_ms / 1000)
+    server.start()
+    try:
+        bench_serial(path, args.count)
+        bench_pipelined(path, args.count)
+        bench_batched(path, args.count)
+    finally:
+        server.close()
+        os.remove(path)
+
+
+if __name__ == "__main__":
+    main()
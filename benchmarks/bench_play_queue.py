@@ -0,0 +1,88 @@
+"""
+Micro-benchmark for the play queue data model.
+
+Compares the old list-of-dicts queue with PlayQueue at N tracks: memory held
+by the track records (tracemalloc) and operations per second for appends,
+current-track and by-URL lookup, advancing (in order and shuffled), removal
+and dedupe.
+
+Usage: python -m benchmarks.bench_play_queue [--tracks N]
+"""
+import argparse
+import time
+import tracemalloc
+
+from src.play_queue import PlayQueue, Track
+
+
+def make_rows(n: int):
+    # Built once outside the measurements so titles/URLs are shared by both models
+    return [(f"Track {i}", f"https://www.youtube.com/watch?v={i:011d}") for i in range(n)]
+
+
+def measure_memory(build) -> int:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    obj = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del obj
+    return after - before
+
+
+def ops_per_sec(fn, count: int) -> float:
+    t0 = time.perf_counter()
+    fn(count)
+    return count / (time.perf_counter() - t0)
+
+
+def report(name: str, rate: float):
+    print(f"{name:<24} {rate:>14,.0f} ops/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=100_000)
+    args = parser.parse_args()
+    n = args.tracks
+    rows = make_rows(n)
+
+    dict_bytes = measure_memory(lambda: [{"title": t, "url": u, "type": "streaming"} for t, u in rows])
+    def build_queue():
+        queue = PlayQueue()
+        queue.extend(Track(t, u, "streaming") for t, u in rows)
+        return queue
+    queue_bytes = measure_memory(build_queue)
+    print(f"{'list of dicts':<24} {dict_bytes / n:>10.1f} bytes/track")
+    print(f"{'PlayQueue':<24} {queue_bytes / n:>10.1f} bytes/track")
+
+    queue = PlayQueue()
+    report("append", ops_per_sec(lambda c: [queue.append(t, u, "streaming") for t, u in rows[:c]], n))
+
+    queue.set_current(n // 2)
+    report("current lookup", ops_per_sec(lambda c: [queue.current_index for _ in range(c)], n))
+
+    def advance(c):
+        queue.set_current(0)
+        for _ in range(c):
+            queue.advance()
+    report("advance", ops_per_sec(advance, n - 1))
+
+    queue.set_shuffle(True)
+    report("advance (shuffled)", ops_per_sec(advance, n - 1))
+    report("upcoming(3) shuffled", ops_per_sec(lambda c: [queue.upcoming(3) for _ in range(c)], 10_000))
+    urls = [u for _, u in rows]
+    report("positions_of(url)", ops_per_sec(lambda c: [queue.positions_of(u) for u in urls[:c]], n))
+
+    t0 = time.perf_counter()
+    removed = queue.remove_where(lambda t: t.title.endswith("0"))
+    print(f"{'remove 10% (one pass)':<24} {(time.perf_counter() - t0) * 1000:>10.1f} ms ({removed:,} tracks)")
+
+    queue.extend(Track(t, u, "streaming") for t, u in rows[:n // 10])
+    t0 = time.perf_counter()
+    removed = queue.dedupe()
+    print(f"{'dedupe':<24} {(time.perf_counter() - t0) * 1000:>10.1f} ms ({removed:,} tracks)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+"""
+Benchmark for the download output profiles.
+
+Generates opus-in-webm test tones (the format YouTube's bestaudio usually is)
+with ffmpeg, then post-processes copies of them under each output profile
+exactly as DownloadQueue does: "mp3" re-encodes, "remux" copies the stream.
+Reports wall time and ffmpeg CPU seconds per track. Needs ffmpeg on PATH.
+
+Usage: python -m benchmarks.bench_postprocess [--tracks N] [--seconds S] [--workers W]
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List
+
+import yt_dlp
+
+from src.downloader import OUTPUT_PROFILES, make_postprocessor
+
+
+def make_tones(directory: str, tracks: int, seconds: int) -> List[str]:
+    paths = []
+    for i in range(tracks):
+        path = os.path.join(directory, f"tone{i}_[{i:011d}].webm")
+        subprocess.run(["ffmpeg", "-v", "error", "-f", "lavfi", "-i", f"sine=frequency={220 + i * 10}:duration={seconds}",
+                        "-ac", "2", "-c:a", "libopus", "-b:a", "128k", path], check=True)
+        paths.append(path)
+    return paths
+
+
+def run_profile(profile: str, sources: List[str], workers: int):
+    with tempfile.TemporaryDirectory() as work_dir:
+        paths = [shutil.copy(src, work_dir) for src in sources]
+        ydl = yt_dlp.YoutubeDL({'quiet': True})
+
+        def convert(path: str) -> float:
+            info = {'filepath': path, 'ext': 'webm', 'id': os.path.basename(path)}
+            pp = make_postprocessor(ydl, profile)
+            ydl.run_pp(pp, info)
+            return pp.ffmpeg_cpu
+
+        t0 = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            cpu = sum(pool.map(convert, paths))
+        wall = time.perf_counter() - t0
+    print(f"{profile:<6} {wall:>7.2f} s wall   {cpu / len(sources):>7.3f} CPU s/track")
+    return cpu
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--tracks", type=int, default=8)
+    parser.add_argument("--seconds", type=int, default=180)
+    parser.add_argument("--workers", type=int, default=2)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as src_dir:
+        sources = make_tones(src_dir, args.tracks, args.seconds)
+        cpu = {profile: run_profile(profile, sources, args.workers) for profile in OUTPUT_PROFILES}
+    print(f"remux saves {cpu['mp3'] / max(cpu['remux'], 1e-9):>6.1f}x CPU")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Micro-benchmark for YoutubeDL instance reuse.
+
+Compares building a fresh yt_dlp.YoutubeDL per call (the old pattern) with
+checking one out of YDLPool. Extraction goes through a local stub extractor,
+so the numbers reflect per-call setup overhead, not network time.
+
+Usage: python -m benchmarks.bench_ydl_pool [--count N]
+"""
+import argparse
+import time
+from typing import Any, Dict, List
+
+import yt_dlp
+from yt_dlp.extractor.common import InfoExtractor
+
+from src.ydl_pool import YDLPool
+
+STUB_OPTS = {'quiet': True, 'simulate': True, 'skip_download': True}
+
+
+class StubIE(InfoExtractor):
+    """Returns a fixed single-format result without touching the network."""
+    _VALID_URL = r'stub:(?P<id>.+)'
+
+    def _real_extract(self, url):
+        video_id = self._match_id(url)
+        return {
+            'id': video_id,
+            'title': f'Stub {video_id}',
+            'url': f'http://127.0.0.1/{video_id}.m4a',
+            'ext': 'm4a',
+        }
+
+
+def make_ydl(opts: Dict[str, Any]) -> yt_dlp.YoutubeDL:
+    ydl = yt_dlp.YoutubeDL(opts)
+    ydl.add_info_extractor(StubIE())
+    return ydl
+
+
+def extract(ydl: yt_dlp.YoutubeDL, i: int):
+    ydl.extract_info(f'stub:video{i}', download=False, ie_key='Stub')
+
+
+def report(name: str, samples: List[float]):
+    per_call = sum(samples) / len(samples)
+    print(f"{name:<10} {per_call * 1000:>8.3f} ms/call   {len(samples) / sum(samples):>10,.0f} calls/s")
+
+
+def bench_fresh(count: int) -> List[float]:
+    samples = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        with make_ydl(dict(STUB_OPTS)) as ydl:
+            extract(ydl, i)
+        samples.append(time.perf_counter() - t0)
+    return samples
+
+
+def bench_pooled(count: int) -> List[float]:
+    pool = YDLPool(profiles={"stub": STUB_OPTS}, factory=make_ydl)
+    pool.prewarm("stub")
+    samples = []
+    for i in range(count):
+        t0 = time.perf_counter()
+        with pool.checkout("stub") as ydl:
+            extract(ydl, i)
+        samples.append(time.perf_counter() - t0)
+    pool.close()
+    return samples
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=200)
+    args = parser.parse_args()
+
+    fresh = bench_fresh(args.count)
+    pooled = bench_pooled(args.count)
+    report("fresh", fresh)
+    report("pooled", pooled)
+    print(f"speedup    {sum(fresh) / sum(pooled):>8.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -3,18 +3,41 @@ from textual.widgets import Header, Footer, ListView, Input, Label, Button, Prog
 from textual.containers import Container, Horizontal, Vertical
 from textual.binding import Binding
 from textual import work
+from textual.worker import get_current_worker
 
-from .ui.widgets import SearchBar, PlayerControls, SearchResultItem, QueueItem, LibraryItem, SavedPlaylistItem
-from .downloader import MusicDownloader, DownloadQueue
+from .ui.widgets import SearchBar, PlayerControls, SearchResultItem, QueueView, LibraryView, LibraryItem, SavedPlaylistItem, ResultsList
+from .downloader import MusicDownloader, DownloadQueue, StreamResolver, OUTPUT_MP3, OUTPUT_PROFILES
 from .engine import AudioEngine
-from .config import get_downloads_dir
+from .config import get_downloads_dir, get_download_workers, get_output_profile, get_transcode_workers
 from .playlist_manager import PlaylistManager
+from .ydl_pool import YDLPool
+from .history import PlayHistory, END_SKIP, END_STOP
+from .library import LibraryIndex
+from .play_queue import PlayQueue, Track, ADDED, CURRENT
+from .store import Store
+from .search_cache import RESULT_FIELDS
+from .services import Services, TaskGroup
+from .session import SessionSaver
+from .text_index import TextIndex
 
+import asyncio
 import os
+import threading
+import time
 
 
 class YTBeatsApp(App):
     CSS_PATH = "ui/styles.css"
+    PREFETCH_DEPTH = 3 # Upcoming streaming tracks to pre-resolve
+    FILTER_DEBOUNCE = 0.1 # Seconds of typing pause before the queue filter runs
+    SEARCH_DEBOUNCE = 0.4 # Seconds of typing pause before a YouTube search starts
+    SEARCH_MIN_CHARS = 3 # Shorter queries only show local matches while typing
+    SEARCH_LIMIT = 10 # Results per page
+    SEARCH_MAX_RESULTS = 500 # Deepest result reachable by scrolling
+    SESSION_INTERVAL = 5.0 # Seconds between session snapshots
+    PLAYLIST_PAGE_BACKLOG = 2 # Fetched playlist pages allowed to wait for the queue
+    RESOLVE_WAIT = 5.0 # Max seconds to wait on an in-flight resolution before letting mpv resolve
+
     BINDINGS = [
         Binding("q", "quit", "Quit"),
         Binding("d", "download_selected", "Download"),
@@ -30,9 +53,45 @@ class YTBeatsApp(App):
 
     def __init__(self):
         super().__init__()
-        self.downloader = MusicDownloader()
-        self.download_queue = DownloadQueue(str(get_downloads_dir()))
-        self.playlist_manager = PlaylistManager()
+        download_workers = get_download_workers()
+        # Shared, pre-warmed yt-dlp instances; every download worker holds one at a time
+        self.ydl_pool = YDLPool(max_per_profile=max(4, download_workers))
+        self.downloader = MusicDownloader(pool=self.ydl_pool)
+        self.stream_resolver = StreamResolver(self.downloader)
+        # Blocking yt-dlp calls awaited from the event loop (search, playlist loads)
+        self.services = Services(self.downloader)
+        self.store = Store()
+        self.output_profile = get_output_profile()
+        if self.output_profile not in OUTPUT_PROFILES:
+            self.output_profile = OUTPUT_MP3
+        self.library = LibraryIndex(get_downloads_dir(), self.store)
+        self.download_queue = DownloadQueue(str(get_downloads_dir()), pool=self.ydl_pool, store=self.store,
+                                            workers=download_workers, postprocess_workers=get_transcode_workers(),
+                                            output_profile=self.output_profile, library=self.library)
+        self.playlist_manager = PlaylistManager(self.store)
+        self.history = PlayHistory(self.store)
+        self.session = SessionSaver(self.store)
+        self._session_restored = False # No snapshots until the saved session is back
+        # Local matches over library, cached search results and saved-playlist entries
+        self.search_index = TextIndex()
+        # Queue titles, keyed by position; synced lazily when the filter is used
+        self.queue_index = TextIndex()
+        self._queue_titles = [] # Casefolded titles, parallel to the indexed queue
+        self._queue_indexed = (None, 0) # (queue generation indexed, entries indexed)
+        self._queue_index_lock = threading.Lock()
+        self._queue_filter_timer = None
+        self._queue_filtered_generation = None # Queue generation the shown filter rows refer to
+        self._search_timer = None
+        self._search_inflight = None # Normalized query of the running YouTube search
+        self._search_announce = False # Whether the running search was submitted with Enter
+        self.last_search_latency = None # Seconds from search start to the first result shown
+        self._search_key = None # Normalized query of the pages below
+        self._search_pages = [] # Result pages fetched so far for _search_key
+        self._search_more = None # Async iterator continuing the search, None once exhausted
+        self._search_loading = False # A next page is being fetched
+        self._showing_search_pages = False # False while the list shows local matches
+        self._now_playing = None # (track_id, started_at) of the open play event
+        self._cued_track = None # Track loaded paused (session restore); its play event opens on first unpause
         self.engine = None 
         self.engine_error = None
         # Engine init is delayed or guarded to handle startup issues
@@ -42,8 +101,10 @@ class YTBeatsApp(App):
             self.engine_error = str(e)
             # We don't print here anymore, we'll notify in on_mount
 
-        self.current_playlist = [] # List of dicts
-        self.current_index = -1
+        self.queue = PlayQueue()
+        self.queue.subscribe(self._on_queue_change)
+        self._last_status = None # Last snapshot drawn by update_status
+        self._download_rows = {} # task id -> (status Label, ProgressBar) for unfinished tasks
 
     def compose(self) -> ComposeResult:
         yield Header()
@@ -55,7 +116,7 @@ class YTBeatsApp(App):
                     with TabPane("YouTube", id="search-tab"):
                         with Vertical():
                             yield SearchBar(id="search-bar")
-                            yield ListView(id="results-list")
+                            yield ResultsList(id="results-list")
                     with TabPane("Playlists", id="playlists-tab"):
                         with Vertical():
                             yield Container(
@@ -78,7 +139,7 @@ class YTBeatsApp(App):
                                 Button("Play All", id="btn-library-play-all", variant="primary", classes="compact-btn"),
                                 classes="library-header-row"
                             )
-                            yield ListView(id="library-list")
+                            yield LibraryView(str(get_downloads_dir()), id="library-list")
                     with TabPane("Downloads", id="downloads-tab"):
                         yield ListView(id="downloads-list")
 
@@ -87,7 +148,7 @@ class YTBeatsApp(App):
             with Vertical(id="right-pane"):
                 yield Label("Up Next", classes="section-header")
                 yield Input(placeholder="Filter queue...", id="queue-search")
-                yield ListView(id="queue-list")
+                yield QueueView(id="queue-list")
                 
         yield PlayerControls(id="player-controls")
         yield Footer()
@@ -97,10 +158,15 @@ class YTBeatsApp(App):
         self.query_one("#search-input", Input).focus()
         self.action_refresh_library()
         self.refresh_saved_playlists()
+        self.prewarm_extractors()
         
         if self.engine:
             # Set the callback for when a track ends
             self.engine.on_track_end = lambda reason: self.call_from_thread(self.action_next_track)
+            # Gapless: MPV already moved on to the appended track, just follow it
+            self.engine.on_track_advance = lambda: self.call_from_thread(self._on_gapless_advance)
+            self.engine.on_file_ended = lambda reason, position: self.call_from_thread(
+                self._close_play_event, reason, position, True)
         
         if not self.engine:
             self.notify(f"Playback Engine Error: {self.engine_error}", severity="error")
@@ -109,16 +175,33 @@ class YTBeatsApp(App):
         
         # Bind queue callbacks
         self.download_queue.on_complete = lambda task: self.call_from_thread(self._on_download_complete, task)
+        if self.download_queue.restored:
+            self.notify(f"Resuming {self.download_queue.restored} unfinished downloads.")
+        # Watcher and scan results arrive from background threads
+        self.library.add_listener(self._on_library_change)
+        self.build_search_index()
+        self.restore_session()
         
-        # Start the update timer
+        # Start the update timers; download changes are coalesced between ticks
         self.set_interval(0.5, self.update_status)
+        self.set_interval(0.1, self.update_downloads_ui)
+        self.set_interval(self.SESSION_INTERVAL, self.save_session)
+
+    @work(thread=True)
+    def prewarm_extractors(self):
+        """Builds the yt-dlp instances used for searching and streaming ahead of time."""
+        self.ydl_pool.prewarm("search", "stream-resolve", "flat-playlist")
 
     def update_status(self):
-        """Periodic UI update."""
+        """Periodic playback status update."""
         try:
-            # 1. Update Playback Status
-            if self.engine:
-                status = self.engine.get_status()
+            status = self.engine.get_status() if self.engine else None
+            if self._cued_track is not None and status and not status.get("paused", True):
+                cued, self._cued_track = self._cued_track, None
+                if self.queue.current is cued:
+                    self._open_play_event(cued)
+            if status and status != self._last_status:
+                self._last_status = status
                 title = status.get("title", "Stopped")
                 paused = status.get("paused", False)
                 status_text = "Paused" if paused else "Playing" 
@@ -136,132 +219,304 @@ class YTBeatsApp(App):
 
                 vol = status.get("volume", 100)
                 self.query_one("#vol-label", Label).update(f"Vol: {vol}%")
-                
-            # 2. Update Downloads
-            self.update_downloads_ui()
         except:
             # Silent fail for the timer to prevent crash
             pass
 
     def update_downloads_ui(self):
-        """Updates the download list with all active and pending tasks."""
-        try:
-            dl_list = self.query_one("#downloads-list", ListView)
-        except:
+        """Applies the download queue's change feed, touching only the affected rows."""
+        changes = self.download_queue.drain_changes()
+        if not changes:
             return
 
-        tasks = self.download_queue.tasks
-        
         try:
-            # If the list count mismatch, fully rebuild (safest)
-            if len(dl_list.children) != len(tasks):
-                dl_list.clear() # Clear existing
-                
-                for i, task in enumerate(tasks):
-                    # Unique IDs based on task id
-                    t_id = id(task)
-                    
-                    # Create ProgressBar without initial progress (set after)
-                    pb = ProgressBar(total=100, classes="dl-progress", id=f"pb-{t_id}")
-                    
-                    # Create generic ListItem with known children IDs
-                    item = ListItem(
+            dl_list = self.query_one("#downloads-list", ListView)
+            new_items = []
+            for task, kinds in changes:
+                if "added" in kinds:
+                    pb = ProgressBar(total=100, classes="dl-progress")
+                    status_lbl = Label(task.status.capitalize(), classes="dl-status")
+                    new_items.append(ListItem(
                         Horizontal(
                             Label(task.title, classes="dl-title"),
-                            Label(task.status.capitalize(), classes="dl-status", id=f"lbl-status-{t_id}"),
+                            status_lbl,
                             pb,
                             classes="dl-item-container"
                         )
-                    )
-                    dl_list.append(item)
-            else:
-                # Update loop
-                for task in tasks:
-                    t_id = id(task)
-                    try:
-                        # Find the widgets by ID in the whole list view 
-                        # (querying by ID is safer than index dependence)
-                        status_lbl = dl_list.query_one(f"#lbl-status-{t_id}", Label)
-                        pb = dl_list.query_one(f"#pb-{t_id}", ProgressBar)
-                        
-                        status_text = task.status.capitalize()
-                        if task.status == "error":
-                            status_text = "Failed"
-                            
-                        status_lbl.update(status_text)
-                        pb.progress = task.progress
-                    except:
-                        # If a single item fails, ignore it
-                        continue
+                    ))
+                    self._download_rows[task.id] = (status_lbl, pb)
 
+                row = self._download_rows.get(task.id)
+                if row is None:
+                    continue # Archived already
+                status_lbl, pb = row
+                status_lbl.update(self._download_status_text(task))
+                pb.progress = task.progress
+
+                if task.status in ("completed", "error"):
+                    # Finished rows never change again; drop them from the hot set
+                    del self._download_rows[task.id]
+
+            if new_items:
+                dl_list.extend(new_items)
         except Exception as e:
             # Log critical UI errors but don't crash
             with open("ui_critical_error.txt", "a") as f: # Append mode
                 f.write(f"Error in update: {e}\n")
 
+    @staticmethod
+    def _download_status_text(task) -> str:
+        """Status cell text: transfer rate and ETA while downloading, else the state."""
+        if task.status == "error":
+            return "Failed"
+        if task.status == "retrying":
+            return f"Retry {task.attempts}/{DownloadQueue.MAX_ATTEMPTS - 1}"
+        if task.status == "downloading" and task.speed:
+            rate = task.speed / 1024
+            rate_text = f"{rate / 1024:.1f}M/s" if rate >= 1024 else f"{rate:.0f}K/s"
+            if task.eta is None:
+                return rate_text
+            m, sec = divmod(int(task.eta), 60)
+            return f"{rate_text} {m}:{sec:02d}"
+        return task.status.capitalize()
+
     def _on_download_complete(self, task):
         """Handle download completion (success or error)."""
         try:
             if task.status == "completed":
-                self.notify(f"Download complete: {task.title}")
-                # Auto-refresh library so the new song shows up
-                self.action_refresh_library()
+                cpu = f" ({task.cpu_seconds:.1f}s CPU)" if task.cpu_seconds is not None else ""
+                self.notify(f"Download complete: {task.title}{cpu}")
+                # Index just the new file so the song shows up without a full rescan
+                if task.filename:
+                    self.update_library_paths([task.filename])
             else:
                 self.notify(f"Download failed: {task.title}\n{task.error_msg}", severity="error")
         except Exception as e:
             with open("callback_error.txt", "w") as f:
                 f.write(str(e))
             
+    async def on_input_changed(self, message: Input.Changed):
+        if message.input.id == "search-input":
+            key = " ".join(message.value.casefold().split())
+            if key != self._search_inflight:
+                # The running search is for older text; its results must not land under the new matches
+                self.workers.cancel_group(self, "search")
+                self._search_inflight = None
+            self._show_local_matches(message.value)
+            # YouTube is searched once typing pauses
+            if self._search_timer:
+                self._search_timer.stop()
+                self._search_timer = None
+            query = message.value.strip()
+            if len(query) >= self.SEARCH_MIN_CHARS:
+                self._search_timer = self.set_timer(self.SEARCH_DEBOUNCE, lambda: self.start_search(query))
+        elif message.input.id == "queue-search":
+            # Restart the debounce window on every keystroke
+            if self._queue_filter_timer:
+                self._queue_filter_timer.stop()
+            self._queue_filter_timer = self.set_timer(self.FILTER_DEBOUNCE, self.refresh_queue_ui)
+
     async def on_input_submitted(self, message: Input.Submitted):
         if message.input.id == "search-input":
             query = message.value
             if not query: return
+            if self._search_timer:
+                self._search_timer.stop()
             self.notify(f"Searching for '{query}'...")
-            self.perform_search(query)
+            self.start_search(query, announce=True)
         elif message.input.id == "queue-search":
             self.refresh_queue_ui()
 
-    @work(exclusive=True, thread=True)
-    def perform_search(self, query: str):
-        results = self.downloader.search(query)
-        
-        # Clear must be done on main thread usually.
-        # We schedule UI update on the main thread via call_from_thread.
-        self.call_from_thread(self._update_results_list, results)
+    def start_search(self, query: str, announce: bool = False):
+        """
+        Starts a YouTube search, unless the same query is already running.
+
+        *announce* (Enter pressed) reports the result count and focuses the list.
+        """
+        self._search_timer = None
+        key = " ".join(query.casefold().split())
+        if key == self._search_inflight:
+            self._search_announce = self._search_announce or announce
+            return # Coalesced with the search already running
+        if key == self._search_key and self._search_pages:
+            # Pages fetched for this query are still in memory; show them again
+            self._update_results_list([res for page in self._search_pages for res in page])
+            if announce:
+                self.query_one("#results-list", ListView).focus()
+            return
+        self._search_inflight = key
+        self._search_announce = announce
+        self.perform_search(query, key)
+
+    @work(exclusive=True, group="search")
+    async def perform_search(self, query: str, key: str):
+        """Streams the first page of YouTube results into the list; a newer search cancels this one."""
+        started = time.perf_counter()
+        previous, self._search_more = self._search_more, None
+        if previous is not None:
+            try:
+                await previous.aclose() # Frees the previous search's extractor
+            except RuntimeError:
+                pass # Still running in a cancelled worker, which closes it
+        self._search_key = key
+        self._search_pages = []
+
+        # Placeholder: results of a shorter query searched before, narrowed to this one
+        provisional = self.downloader.search_cache.get_prefix(query, self.SEARCH_LIMIT)
+        if provisional:
+            self._update_results_list(provisional)
+
+        results = self.services.iter_search(query, self.SEARCH_LIMIT, self.SEARCH_MAX_RESULTS)
+        self._search_more = results
+        try:
+            page = await self._fetch_results_page(results, replace=True, started=started)
+        finally:
+            if self._search_inflight == key:
+                self._search_inflight = None
+
+        if page:
+            self._search_pages.append(page)
+            self._index_results(page)
+        if len(page) < self.SEARCH_LIMIT and self._search_more is results:
+            self._search_more = None
+        if not page:
+            self._update_results_list([], announce=self._search_announce)
+        elif self._search_announce:
+            self.notify(f"Found {len(page)} results.")
+            self.query_one("#results-list", ListView).focus()
+
+    async def on_results_list_near_end(self, message: ResultsList.NearEnd):
+        if (self._showing_search_pages and self._search_more is not None
+                and not self._search_loading and self._search_inflight is None):
+            self.load_more_results()
+
+    @work(exclusive=True, group="search")
+    async def load_more_results(self):
+        """Fetches the next page of the current search, continuing where the last one stopped."""
+        results = self._search_more
+        if results is None:
+            return
+        self._search_loading = True
+        try:
+            page = await self._fetch_results_page(results, replace=False)
+        finally:
+            self._search_loading = False
+        if page:
+            self._search_pages.append(page)
+            self._index_results(page)
+        if len(page) < self.SEARCH_LIMIT and self._search_more is results:
+            self._search_more = None # Exhausted
+
+    async def _fetch_results_page(self, results, replace: bool, started: float = None):
+        """Pulls up to one page from a result stream, showing each result as it arrives."""
+        page = []
+        while len(page) < self.SEARCH_LIMIT:
+            try:
+                res = await results.__anext__()
+            except StopAsyncIteration:
+                break
+            if replace and not page:
+                if started is not None:
+                    self.last_search_latency = time.perf_counter() - started
+                self._update_results_list([res])
+            else:
+                self._append_results([res])
+            page.append(res)
+        return page
+
+    @work(thread=True, group="search-index")
+    def build_search_index(self):
+        """Fills the local search index from the library, search cache and playlist cache."""
+        for path in self.library.paths():
+            self._index_library_path(path)
+        self._index_results(self.downloader.search_cache.all_results())
+        self._index_results(self.playlist_manager.all_cached_entries(), source="Saved playlist")
+
+    def _index_library_path(self, path: str):
+        entry = self.library.get(path)
+        if entry is None:
+            self.search_index.remove(("local", path))
+            return
+        title = os.path.relpath(path, self.library.root_dir)
+        text = " ".join([title] + [entry[f] for f in ("title", "artist", "album") if entry.get(f)])
+        self.search_index.add(("local", path), text, {"title": title, "path": path})
+
+    def _index_results(self, results, source: str = None):
+        """Indexes YouTube results (search results or playlist entries) by video ID."""
+        for res in results or []:
+            vid_id = res.get('id')
+            if vid_id and res.get('title'):
+                payload = {k: res[k] for k in RESULT_FIELDS if res.get(k) is not None}
+                if source and not payload.get('uploader'):
+                    payload['uploader'] = source
+                self.search_index.add(("youtube", vid_id), res['title'], payload)
 
-    def _update_results_list(self, results):
+    def _on_library_change(self, upserted, removed):
+        """Library watcher callback (background thread)."""
+        for path in upserted + removed:
+            self._index_library_path(path)
+        self.call_from_thread(self._apply_library_changes, upserted, removed)
+
+    def _show_local_matches(self, query: str, limit: int = 10):
+        """Shows local index matches in the results list while typing."""
+        keys = self.search_index.search(query)
+        if not keys:
+            return
+        # Shorter titles first: the query makes up more of them; library before YouTube
+        payloads = sorted((self.search_index.payload(k) for k in keys),
+                          key=lambda p: ("path" not in p, len(p['title'])))[:limit]
+        list_view = self.query_one("#results-list", ListView)
+        list_view.clear()
+        self._showing_search_pages = False
+        searching = " - searching YouTube..." if len(query.strip()) >= self.SEARCH_MIN_CHARS else ""
+        list_view.append(ListItem(Label(f"Local matches ({len(keys)}){searching}", classes="result-meta")))
+        for p in payloads:
+            if "path" in p:
+                list_view.append(LibraryItem(p['title'], p['path']))
+            else:
+                list_view.append(SearchResultItem(
+                    title=p['title'],
+                    uploader=p.get('uploader') or p.get('channel') or 'Unknown',
+                    video_id=p['id'],
+                    duration=self._format_duration(p)
+                ))
+
+    @staticmethod
+    def _format_duration(res) -> str:
+        duration = res.get('duration_string')
+        if duration:
+            return duration
+        # Fallback to duration in seconds
+        seconds = res.get('duration')
+        if not seconds:
+            return "N/A"
+        m, s = divmod(int(seconds), 60)
+        if m >= 60:
+            h, m = divmod(m, 60)
+            return f"{h}:{m:02d}:{s:02d}"
+        return f"{m}:{s:02d}"
+
+    def _update_results_list(self, results, announce: bool = False):
+        """Replaces the results list. *announce* reports an empty result."""
         list_view = self.query_one("#results-list", ListView)
         list_view.clear()
+        self._showing_search_pages = True
         if not results:
             list_view.append(ListItem(Label("No results found. Try another search.", classes="result-meta")))
-            self.notify("No results found.", severity="warning")
+            if announce:
+                self.notify("No results found.", severity="warning")
             return
-            
-        for res in results:
-            duration = res.get('duration_string')
-            if not duration:
-                # Fallback to duration in seconds
-                seconds = res.get('duration')
-                if seconds:
-                    m, s = divmod(int(seconds), 60)
-                    if m >= 60:
-                        h, m = divmod(m, 60)
-                        duration = f"{h}:{m:02d}:{s:02d}"
-                    else:
-                        duration = f"{m}:{s:02d}"
-                else:
-                    duration = "N/A"
-
-            item = SearchResultItem(
-                title=res.get('title', 'Unknown'),
-                uploader=res.get('uploader', 'Unknown'),
-                video_id=res.get('id', ''),
-                duration=duration
-            )
-            list_view.append(item)
-        
-        self.notify(f"Found {len(results)} results.")
-        self.query_one("#results-list", ListView).focus()
+        self._append_results(results)
+
+    def _append_results(self, results):
+        """Appends YouTube results below the ones already listed."""
+        list_view = self.query_one("#results-list", ListView)
+        list_view.extend(SearchResultItem(
+            title=res.get('title') or 'Unknown',
+            uploader=res.get('uploader') or res.get('channel') or 'Unknown',
+            video_id=res.get('id', ''),
+            duration=self._format_duration(res)
+        ) for res in results)
 
     async def on_list_view_selected(self, message: ListView.Selected):
         """Handle selection."""
@@ -270,11 +525,15 @@ class YTBeatsApp(App):
             self.enqueue(item.title, f"https://www.youtube.com/watch?v={item.video_id}", "streaming")
         elif isinstance(item, LibraryItem):
             self.enqueue(item.title, item.path, "local")
-        elif isinstance(item, QueueItem):
-            # Play from the selected queue item
-            # Use the stored track index from the item, which handles filtered states correctly
-            self.current_index = item.track_index
-            self._start_playback()
+
+    async def on_library_view_selected(self, message: LibraryView.Selected):
+        self.enqueue(message.title, message.path, "local")
+
+    async def on_queue_view_selected(self, message: QueueView.Selected):
+        """Play from the selected queue row."""
+        # The row carries its queue position, which handles filtered states correctly
+        self.queue.set_current(message.track_index)
+        self._start_playback()
 
     async def on_button_pressed(self, event: Button.Pressed):
         # Clear focus from the button to prevent sticky state
@@ -295,39 +554,21 @@ class YTBeatsApp(App):
 
     def action_play_all_library(self):
         """Replaces queue with all library items and plays."""
-        lib_list = self.query_one("#library-list", ListView)
-        if not lib_list.children:
+        lib_view = self.query_one("#library-list", LibraryView)
+        if not lib_view.paths:
             self.notify("Library is empty.", severity="warning")
             return
             
         self.notify("Playing all library tracks...")
         
-        # Clear existing queue
-        self.current_playlist = []
-        self.current_index = -1
-        
-        # Add all items
-        for child in lib_list.children:
-            if isinstance(child, LibraryItem):
-                self.current_playlist.append({
-                    "title": child.title,
-                    "url": child.path,
-                    "type": "local"
-                })
-        
-        self.refresh_queue_ui()
+        # Replace the queue with all library items
+        self.queue.replace(Track(lib_view.title_of(path), path, "local") for path in lib_view.paths)
         self.action_next_track()
 
     def enqueue(self, title: str, url: str, source_type: str):
         """Add a song to the queue."""
-        self.current_playlist.append({
-            "title": title,
-            "url": url,
-            "type": source_type
-        })
-        
-        # Update Queue UI logic to respect filter
-        self.refresh_queue_ui()
+        # The queue's change event refreshes the queue view
+        self.queue.append(title, url, source_type)
         
         # Determine if we should start playing immediately
         # We start if the engine isn't running or if it's currently stopped/idle
@@ -340,14 +581,14 @@ class YTBeatsApp(App):
         if should_start:
             self.action_next_track()
         else:
+            self._prefetch_upcoming()
             self.notify(f"Queued: {title}")
 
     def action_next_track(self):
         """Skip to the next track."""
         if not self.engine: return
         
-        if self.current_index + 1 < len(self.current_playlist):
-            self.current_index += 1
+        if self.queue.advance():
             self._start_playback()
         else:
             self.notify("End of queue reached.")
@@ -356,111 +597,232 @@ class YTBeatsApp(App):
         """Go back to the previous track."""
         if not self.engine: return
         
-        if self.current_index > 0:
-            self.current_index -= 1
+        if self.queue.advance(-1):
             self._start_playback()
         else:
             self.notify("Already at the start of the queue.")
 
-    def _start_playback(self):
-        """Common logic to start playing the current_index track."""
-        if 0 <= self.current_index < len(self.current_playlist):
-            track = self.current_playlist[self.current_index]
-            self.query_one("#status-label", Label).update(f"Playing: {track['title']}")
-            self._update_queue_status()
+    def _start_playback(self, start: float = None, paused: bool = False):
+        """Common logic to start playing the queue's current track, optionally from *start* seconds."""
+        track = self.queue.current
+        if track:
+            self.query_one("#status-label", Label).update(f"{'Paused' if paused else 'Playing'}: {track.title}")
+            # Whatever was still playing is being skipped
+            self._close_play_event(END_SKIP)
+            # A track only cued up paused is not a play until it actually plays
+            self._cued_track = track if paused else None
+            if not paused:
+                self._open_play_event(track)
             
             # Use a worker to keep UI responsive and prevent overlap
-            self.run_playback_worker(track['url'])
+            self.run_playback_worker(track.url, track.title, track.type, start, paused)
+            self._prefetch_upcoming()
         else:
             self.query_one("#status-label", Label).update("Stopped")
-            self._update_queue_status()
 
     @work(exclusive=True, thread=True)
-    def run_playback_worker(self, url: str):
+    def run_playback_worker(self, url: str, title: str, source_type: str,
+                            start: float = None, paused: bool = False):
         """Exclusive worker to handle MPV play calls."""
-        if self.engine:
-            self.engine.play(url)
+        if not self.engine:
+            return
+
+        play_url = self._resolve_play_url(url, source_type)
+        if get_current_worker().is_cancelled:
+            return # Superseded by a newer track change while waiting
+
+        self.engine.play(play_url, title=title, start=start, paused=paused)
+        self.call_from_thread(self._queue_next_gapless)
+
+    @work(exclusive=True, thread=True, group="gapless")
+    def run_queue_next_worker(self, url: str, title: str, source_type: str):
+        """Appends the following track to MPV's playlist for gapless playback."""
+        play_url = self._resolve_play_url(url, source_type)
+        if self.engine and not get_current_worker().is_cancelled:
+            self.engine.queue_next(play_url, title)
+
+    def _resolve_play_url(self, url: str, source_type: str) -> str:
+        """Returns the pre-resolved stream URL when available, else the original URL."""
+        if source_type != "streaming":
+            return url
+        # Skip mpv's ytdl_hook when the direct audio URL is already known
+        return self.stream_resolver.get(url, timeout=self.RESOLVE_WAIT) or url
+
+    def _queue_next_gapless(self):
+        """Keeps the track after the current one appended in MPV's playlist."""
+        if not self.engine or not self.engine.gapless:
+            return
+        next_index = self.queue.next_index()
+        if self.queue.current and next_index >= 0:
+            track = self.queue[next_index]
+            self.run_queue_next_worker(track.url, track.title, track.type)
+        else:
+            self.engine.queue_next(None)
+
+    def _on_gapless_advance(self):
+        """Follows MPV after it advanced through its own playlist."""
+        if self.queue.advance():
+            track = self.queue.current
+            self.query_one("#status-label", Label).update(f"Playing: {track.title}")
+            self._open_play_event(track)
+            self._prefetch_upcoming()
+
+    def _open_play_event(self, track):
+        self._now_playing = (track.url, time.time())
+
+    def _close_play_event(self, reason: str, position: float = None, ended: bool = False):
+        """
+        Records the open play event with the position it reached.
+
+        A file that *ended* by itself comes with the last position the engine
+        saw for it, since by now mpv has unloaded it (or moved on to the next
+        track). Skips and stops read the still-playing position.
+        """
+        if not self._now_playing:
+            return
+        track_id, started_at = self._now_playing
+        self._now_playing = None
+        if not ended and self.engine:
+            position = self.engine.get_status().get("position")
+        self.history.record(track_id, started_at, time.time(), position, reason)
+
+    def _prefetch_upcoming(self):
+        """Pre-resolves the next few streaming tracks and queues the next one gaplessly."""
+        upcoming = [self.queue[i] for i in self.queue.upcoming(self.PREFETCH_DEPTH)]
+        urls = [t.url for t in upcoming if t.type == "streaming"]
+        if urls:
+            self.stream_resolver.prefetch(urls)
+        self._queue_next_gapless()
 
     def _update_queue_status(self):
-        """Updates the status labels in the queue list."""
-        queue_list = self.query_one("#queue-list", ListView)
-        for item in queue_list.children:
-            if isinstance(item, QueueItem):
-                status_label = item.query_one(".queue-status", Label)
-                
-                # Use stored index
-                if item.track_index < self.current_index:
-                    status_label.update("Finished")
-                    item.remove_class("playing-now")
-                elif item.track_index == self.current_index:
-                    status_label.update("Playing")
-                    item.add_class("playing-now")
-                else:
-                    status_label.update("Pending")
-                    item.remove_class("playing-now")
+        """Updates the playing/finished markers in the queue (redraws visible rows only)."""
+        self.query_one("#queue-list", QueueView).set_current(self.queue.current_index)
 
-    def refresh_queue_ui(self):
-        """Rebuilds the queue list based on current playlists and filter."""
-        queue_list = self.query_one("#queue-list", ListView)
+    def _on_queue_change(self, kind: str, start: int, count: int):
+        """PlayQueue subscriber: keeps the queue view in step with the model."""
+        if kind == CURRENT:
+            self._update_queue_status()
+        else:
+            self.refresh_queue_ui(changed=kind != ADDED)
+
+    def refresh_queue_ui(self, changed: bool = False):
+        """
+        Points the queue view at the queue; an active filter runs in a worker.
+
+        *changed* means existing positions now hold other tracks (remove, move, replace).
+        """
+        queue_view = self.query_one("#queue-list", QueueView)
+        if self._queue_filter_timer:
+            self._queue_filter_timer.stop()
+            self._queue_filter_timer = None
         try:
-            filter_text = self.query_one("#queue-search", Input).value.lower()
+            filter_text = self.query_one("#queue-search", Input).value.casefold().strip()
         except:
             filter_text = ""
             
-        queue_list.clear()
-        
-        for i, track in enumerate(self.current_playlist):
-            if not filter_text or filter_text in track['title'].lower():
-                # Determine status based on global index
-                status = "Pending"
-                if i < self.current_index: status = "Finished"
-                elif i == self.current_index: status = "Playing"
-                
-                item = QueueItem(track['title'], status, i)
-                if i == self.current_index:
-                    item.add_class("playing-now")
-                queue_list.append(item)
+        queue_view.set_current(self.queue.current_index)
+        if filter_text:
+            if self._queue_filtered_generation != self.queue.generation:
+                # Old rows point at shifted positions; show nothing until the pass lands
+                queue_view.set_rows(self.queue, [], changed=True)
+                self._queue_filtered_generation = self.queue.generation
+            self.filter_queue_worker(filter_text, self.queue.generation)
+        else:
+            self._queue_filtered_generation = None
+            queue_view.set_rows(self.queue, range(len(self.queue)), changed=changed)
+
+    @work(thread=True, exclusive=True, group="queue-filter")
+    def filter_queue_worker(self, filter_text: str, generation: int):
+        """Filters the queue off the UI thread; a newer pass cancels this one."""
+        worker = get_current_worker()
+        with self._queue_index_lock:
+            try:
+                titles = self._sync_queue_index(generation)
+            except IndexError:
+                return # The queue changed underneath; a newer pass follows
+            if worker.is_cancelled:
+                return
+            rows = sorted(self.queue_index.search(filter_text))
+        if not rows:
+            # No word starts with the text: fall back to a substring scan
+            rows = []
+            for start in range(0, len(titles), 10000):
+                if worker.is_cancelled:
+                    return
+                rows.extend(i for i in range(start, min(start + 10000, len(titles)))
+                            if filter_text in titles[i])
+        if not worker.is_cancelled:
+            self.call_from_thread(self._apply_queue_filter, filter_text, generation, rows)
+
+    def _apply_queue_filter(self, filter_text: str, generation: int, rows):
+        try:
+            current = self.query_one("#queue-search", Input).value.casefold().strip()
+        except:
+            return
+        if current != filter_text or generation != self.queue.generation:
+            return # Superseded while the pass was running
+        self.query_one("#queue-list", QueueView).set_rows(self.queue, rows)
+
+    def _sync_queue_index(self, generation: int):
+        """Brings the queue index and casefolded titles up to date with the queue.
+        Appends are indexed incrementally; any other change triggers a rebuild.
+        Caller holds _queue_index_lock."""
+        indexed_generation, count = self._queue_indexed
+        if indexed_generation != generation or count > len(self.queue):
+            self.queue_index.clear()
+            self._queue_titles = []
+            count = 0
+        end = len(self.queue)
+        for i in range(count, end):
+            title = self.queue[i].title
+            self.queue_index.add(i, title)
+            self._queue_titles.append(title.casefold())
+        self._queue_indexed = (generation, end)
+        return self._queue_titles
 
     def action_clear_queue(self):
         """Clear the entire playlist."""
-        self.current_playlist = []
-        self.current_index = -1
-        self.query_one("#queue-list", ListView).clear()
+        self._close_play_event(END_STOP)
+        self.queue.clear()
         if self.engine:
             self.engine.stop()
         self.query_one("#status-label", Label).update("Stopped")
         self.notify("Queue cleared.")
         
-    @work(thread=True)
+    @work(thread=True, exclusive=True, group="library")
     def action_refresh_library(self):
-        """Scan download directory for songs in the background."""
-        down_dir = get_downloads_dir()
-        files = []
+        """Reconcile the library index with the download folder in the background."""
         try:
-            for f in os.listdir(down_dir):
-                if f.endswith((".mp3", ".m4a", ".webm", ".opus")):
-                    full_path = str(down_dir / f)
-                    files.append(LibraryItem(f, full_path))
+            # Only new or modified files get their metadata re-read
+            self.library.scan()
         except Exception as e:
             self.notify(f"Error scanning library: {e}", severity="error")
             return
         
-        self.call_from_thread(self._update_library_list, files)
-
-    def _update_library_list(self, files):
-        """Updates the library list items on the main thread."""
-        lib_list = self.query_one("#library-list", ListView)
-        lib_list.clear()
-        for item in files:
-            lib_list.append(item)
+        self.library.start_watching()
+        self.call_from_thread(self._update_library_list, self.library.paths())
+
+    @work(thread=True, group="library")
+    def update_library_paths(self, paths):
+        """Re-index specific files in the background."""
+        self.library.update_paths(paths)
+
+    def _update_library_list(self, paths):
+        """Points the library view at the index's paths on the main thread."""
+        self.query_one("#library-list", LibraryView).set_paths(paths)
         
-        if files:
+        if paths:
             # Switch to library tab automatically to show findings
             try:
                 self.query_one(TabbedContent).active = "library-tab"
             except:
                 pass
-            self.notify(f"Library updated: {len(files)} files found.")
+            self.notify(f"Library updated: {len(paths)} files found.")
+
+    def _apply_library_changes(self, upserted, removed):
+        """Applies incremental index changes to the library list."""
+        # The view only draws visible rows, so re-reading the sorted paths is all it takes
+        self.query_one("#library-list", LibraryView).set_paths(self.library.paths())
 
     def action_download_selected(self):
         """Download the selected item in the list."""
@@ -477,7 +839,7 @@ class YTBeatsApp(App):
                     url = f"https://www.youtube.com/watch?v={item.video_id}"
                     task = self.download_queue.add(url, item.title)
                     if task is None:
-                        self.notify(f"Already in library: {item.title}", severity="warning")
+                        self.notify(f"Already in library or queued: {item.title}", severity="warning")
                     else:
                         self.notify(f"Added to Downloads: {item.title}")
                         # Switch tab to show it
@@ -488,17 +850,17 @@ class YTBeatsApp(App):
                     return
 
             # Case 2: Downloading from the active Queue (Up Next)
-            queue_list = self.query_one("#queue-list", ListView)
-            if queue_list.has_focus and queue_list.highlighted_child:
-                idx = queue_list.index
-                if idx is not None and 0 <= idx < len(self.current_playlist):
-                    track = self.current_playlist[idx]
-                    if track["type"] == "streaming":
-                        task = self.download_queue.add(track["url"], track["title"])
+            queue_view = self.query_one("#queue-list", QueueView)
+            if queue_view.has_focus:
+                idx = queue_view.highlighted_track
+                if idx is not None and 0 <= idx < len(self.queue):
+                    track = self.queue[idx]
+                    if track.type == "streaming":
+                        task = self.download_queue.add(track.url, track.title)
                         if task is None:
-                            self.notify(f"Already in library: {track['title']}", severity="warning")
+                            self.notify(f"Already in library or queued: {track.title}", severity="warning")
                         else:
-                            self.notify(f"Downloading from Queue: {track['title']}")
+                            self.notify(f"Downloading from Queue: {track.title}")
                             try:
                                 self.query_one("#main-tabs", TabbedContent).active = "downloads-tab"
                             except:
@@ -553,46 +915,101 @@ class YTBeatsApp(App):
         else:
             self.notify("No playlist selected to delete.", severity="warning")
 
-    @work(exclusive=True, thread=True)
-    def load_playlist_videos(self, url: str):
-        """Fetches videos from playlist and queues them."""
-        self.notify("Fetching playlist info...")
-        videos = self.downloader.extract_playlist(url)
-        self.call_from_thread(self._add_playlist_to_queue, videos)
+    @work(exclusive=True, group="playlist")
+    async def load_playlist_videos(self, url: str):
+        """
+        Queues a playlist, instantly from the content cache when available.
 
-    def _add_playlist_to_queue(self, videos):
-        if not videos:
+        Without a cache entry, pages are queued as they arrive. With one, the
+        remote playlist is re-extracted in the background and only the
+        added/removed entries are applied to the queue. Loading another
+        playlist cancels the fetch and everything started for it.
+        """
+        cached = await self.services.call(self.playlist_manager.get_cached_entries, url)
+        if cached:
+            self._add_playlist_to_queue(cached, True)
+            self._finish_playlist_load(len(cached))
+        else:
+            self.notify("Fetching playlist info...")
+
+        # Fetching and queueing run as one task group: pages are fetched ahead
+        # while earlier ones are queued and indexed, the bounded page queue
+        # stops the fetch from running away, and a failure or cancellation in
+        # either half cancels the other
+        pages = asyncio.Queue(maxsize=self.PLAYLIST_PAGE_BACKLOG)
+        entries = []
+        complete = [False]
+
+        async def fetch():
+            try:
+                async for page in self.services.iter_playlist(url):
+                    await pages.put(page)
+                complete[0] = True
+            except Exception:
+                pass # Partial playlist: what arrived is queued, but it is not the whole list
+            await pages.put(None)
+
+        async def consume():
+            while (page := await pages.get()) is not None:
+                if not cached:
+                    self._add_playlist_to_queue(page, not entries)
+                    await self.services.call(self._index_results, page, "Saved playlist")
+                entries.extend(page)
+
+        async with TaskGroup() as group:
+            group.create_task(fetch())
+            group.create_task(consume())
+
+        if not cached:
+            self._finish_playlist_load(len(entries))
+        if not complete[0] or not entries:
+            # Keep the cache when the refresh failed or came back empty: a
+            # partial list would read as removals and pull tracks out of the queue
+            return
+
+        added, removed = await self.services.call(self.playlist_manager.update_cached_entries, url, entries)
+        if cached and (added or removed):
+            await self.services.call(self._index_results, added, "Saved playlist")
+            self._apply_playlist_diff(added, removed)
+
+    def _finish_playlist_load(self, total: int):
+        if total:
+            self.notify(f"Added {total} tracks from playlist.")
+        else:
             self.notify("No videos found in playlist or invalid URL.", severity="error")
+
+    def _apply_playlist_diff(self, added, removed_ids):
+        """Applies a background playlist refresh: drops removed entries, appends new ones."""
+        if removed_ids:
+            # The playing track is kept; it is never pulled out from under the player
+            if self.queue.remove_urls(f"https://www.youtube.com/watch?v={vid_id}" for vid_id in removed_ids):
+                self._prefetch_upcoming()
+
+        # Entries already queued (e.g. enqueued by hand) are not added twice
+        self._add_playlist_to_queue([vid for vid in added
+                                     if f"https://www.youtube.com/watch?v={vid.get('id')}" not in self.queue],
+                                    first_page=False)
+        self.notify(f"Playlist updated: {len(added)} added, {len(removed_ids)} removed.")
+
+    def _add_playlist_to_queue(self, videos, first_page: bool = True):
+        """Appends one page of playlist entries; playback may start on the first page."""
+        if not videos:
             return
-            
-        self.notify("Processing playlist items...")
         
         # Capture state before adding
-        was_empty = len(self.current_playlist) == 0
-        was_at_end = self.current_index == len(self.current_playlist) - 1
+        was_empty = len(self.queue) == 0
+        was_at_end = self.queue.next_index() < 0
         
-        count = 0
-        for vid in videos:
-            title = vid.get('title', 'Unknown')
-            vid_id = vid.get('id')
-            if vid_id:
-                url = f"https://www.youtube.com/watch?v={vid_id}"
-                # Append directly to data model instead of using enqueue() one by one
-                self.current_playlist.append({
-                    "title": title,
-                    "url": url,
-                    "type": "streaming"
-                })
-                count += 1
+        # One extend (and one change event / UI refresh) per page
+        tracks = [Track(vid.get('title') or 'Unknown', f"https://www.youtube.com/watch?v={vid['id']}", "streaming")
+                  for vid in videos if vid.get('id')]
+        self.queue.extend(tracks)
         
-        if count > 0:
-            # Single UI refresh after all items are added
-            self.refresh_queue_ui()
-            self.notify(f"Added {count} tracks from playlist.")
+        if tracks:
             
             # Check if we should auto-start playback
             should_start = False
-            if self.engine:
+            if first_page and self.engine:
                 status = self.engine.get_status()
                 # If engine is stopped, we might want to start
                 if status.get("title") == "Stopped" or status.get("title") == "Idle":
@@ -601,6 +1018,8 @@ class YTBeatsApp(App):
             # Only auto-start if we were truly stopped/empty or at the end of the previous queue
             if should_start and (was_empty or was_at_end):
                 self.action_next_track()
+            else:
+                self._prefetch_upcoming()
 
     def save_current_playlist_input(self):
         url = self.query_one("#playlist-url-input", Input).value
@@ -625,9 +1044,50 @@ class YTBeatsApp(App):
         for p in playlists:
             pl_list.append(SavedPlaylistItem(p['name'], p['url']))
 
+    @work(thread=True, group="session")
+    def restore_session(self):
+        """Loads the last session off the UI thread, then puts it back into the queue."""
+        try:
+            tracks, current_index, position = self.session.load()
+        except Exception:
+            tracks, current_index, position = [], -1, None
+        self.call_from_thread(self._restore_session, tracks, current_index, position)
+
+    def _restore_session(self, tracks, current_index: int, position: float):
+        """Refills the queue and cues the last track, paused at its saved position."""
+        # Anything queued while loading wins; the next snapshot then replaces the old session
+        if tracks and not len(self.queue):
+            self.queue.replace(tracks)
+            self.session.mark_restored(self.queue)
+            if 0 <= current_index < len(self.queue):
+                self.queue.set_current(current_index)
+                if self.engine:
+                    self._start_playback(start=position, paused=True)
+            self.notify(f"Restored {len(tracks)} tracks from last session.")
+        self._session_restored = True
+
+    def save_session(self):
+        """Periodic snapshot of the queue and playback position."""
+        if not self._session_restored:
+            return
+        position = None
+        if self.engine and self.queue.current:
+            position = self.engine.get_status().get("position")
+        self.session.snapshot(self.queue, position)
+
     def on_unmount(self):
+        self.save_session()
+        self._close_play_event(END_STOP)
         if self.engine:
             self.engine.quit()
+        self.download_queue.close()
+        self.stream_resolver.close()
+        self.ydl_pool.close()
+        self.library.close()
+        self.services.close()
+        self.history.close()
+        self.session.close()
+        self.store.close()
 
     def action_volume_up(self):
         if isinstance(self.focused, Input): return
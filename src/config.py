@@ -23,6 +23,24 @@ def get_downloads_dir() -> Path:
     downloads_dir.mkdir(exist_ok=True)
     return downloads_dir
 
+def get_output_profile() -> str:
+    """Download output profile: "mp3" (default) or "remux" (keep the original audio stream)."""
+    return os.environ.get("YTBEATS_OUTPUT", "mp3").strip().lower() or "mp3"
+
+def get_download_workers() -> int:
+    """Number of parallel downloads (YTBEATS_DOWNLOAD_WORKERS, default 3)."""
+    try:
+        return max(1, int(os.environ.get("YTBEATS_DOWNLOAD_WORKERS", "3")))
+    except ValueError:
+        return 3
+
+def get_transcode_workers() -> int:
+    """Number of parallel FFmpeg conversions (YTBEATS_TRANSCODE_WORKERS, default 2)."""
+    try:
+        return max(1, int(os.environ.get("YTBEATS_TRANSCODE_WORKERS", "2")))
+    except ValueError:
+        return 2
+
 def get_mpv_path() -> str:
     """Returns the absolute path to mpv executable, preferring .exe over .com."""
     mpv = shutil.which("mpv")
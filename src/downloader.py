@@ -1,51 +1,334 @@
-import yt_dlp
+import itertools
 import threading
 import queue
 import time
 import os
+import re
 import shutil
-from typing import List, Dict, Any, Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, Future
+from typing import List, Dict, Any, Callable, Iterator, Optional, Set, Tuple
+from urllib.parse import urlparse, parse_qs
+
+import yt_dlp
+from yt_dlp.networking.exceptions import HTTPError, TransportError
+from yt_dlp.postprocessor import FFmpegExtractAudioPP
+from yt_dlp.utils import ContentTooShortError
+
+from .library import LibraryIndex
+from .search_cache import SearchCache
+from .store import Store
+from .ydl_pool import YDLPool
+
+# Output profiles: what post-processing turns a downloaded audio stream into
+OUTPUT_MP3 = "mp3"     # Full decode and re-encode to 192k MP3
+OUTPUT_REMUX = "remux" # Keep the original opus/m4a stream, copied into an audio container
+OUTPUT_PROFILES = (OUTPUT_MP3, OUTPUT_REMUX)
+
+class MeasuredExtractAudioPP(FFmpegExtractAudioPP):
+    """
+    FFmpegExtractAudioPP that adds up the CPU time of its own ffmpeg runs.
+
+    ffmpeg reports it itself (-benchmark), so conversions running in parallel
+    never count each other's time, unlike process-wide child rusage.
+    """
+    BENCH_RE = re.compile(r'bench: utime=([\d.]+)s stime=([\d.]+)s')
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ffmpeg_cpu = 0.0
+
+    def real_run_ffmpeg(self, input_path_opts, output_path_opts, **kwargs):
+        (out_path, opts), *rest = output_path_opts
+        stderr = super().real_run_ffmpeg(input_path_opts, [(out_path, ['-benchmark', *opts]), *rest], **kwargs)
+        for match in self.BENCH_RE.finditer(stderr or ""):
+            self.ffmpeg_cpu += float(match.group(1)) + float(match.group(2))
+        return stderr
+
+def make_postprocessor(ydl, output_profile: str) -> MeasuredExtractAudioPP:
+    """The FFmpeg post-processor that implements *output_profile*."""
+    if output_profile == OUTPUT_REMUX:
+        # 'best' copies the stream (webm/opus -> .opus) and leaves m4a untouched
+        return MeasuredExtractAudioPP(ydl, preferredcodec='best')
+    return MeasuredExtractAudioPP(ydl, preferredcodec='mp3', preferredquality='192')
 
 class DownloadTask:
+    _ids = itertools.count(1)
+
     def __init__(self, url: str, title: str, playlist_name: str = None):
+        self.id = next(self._ids)
         self.url = url
         self.title = title
         self.playlist_name = playlist_name
-        self.status = "pending" # pending, downloading, completed, error
+        self.status = "pending" # pending, downloading, retrying, converting, completed, error
         self.progress = 0.0
+        self.downloaded_bytes = 0
+        self.total_bytes: Optional[int] = None
+        self.speed: Optional[float] = None  # bytes/sec, smoothed
+        self.eta: Optional[float] = None    # seconds
         self.error_msg = None
         self.filename = None
+        self.video_id = None
+        self.job_id: Optional[int] = None # Row in the store's download journal
+        self.attempts = 0 # Failed attempts so far
+        self.retry_at: Optional[float] = None
+        self.cpu_seconds: Optional[float] = None # Spent post-processing
+
+class VideoIndex:
+    """
+    Video ID -> file path index of the download library.
+
+    Derived from the LibraryIndex rather than scanned separately: built from
+    its paths, then kept current by its change callback (and by add() as
+    downloads complete, before the watcher reports them). Nothing is persisted;
+    the library's own store rows are the source of truth.
+    """
+    # Files are saved as "title_[videoId].ext"
+    FILENAME_ID_RE = re.compile(r'\[([a-zA-Z0-9_-]{11})\]\.\w+$')
+
+    def __init__(self, library: LibraryIndex):
+        self.library = library
+        self._lock = threading.Lock()
+        self._paths: Dict[str, str] = {}
+        # Listen first: changes racing the initial fill are applied after it, and
+        # applying one the fill already saw is a no-op
+        with self._lock:
+            library.add_listener(self._on_library_change)
+            for path in library.paths():
+                self._add(path)
+
+    def get(self, video_id: str) -> Optional[str]:
+        """Returns the file path for *video_id*, or None if it is not (or no longer) on disk."""
+        with self._lock:
+            path = self._paths.get(video_id)
+        if path and not os.path.exists(path):
+            self._forget(path, video_id)
+            return None
+        return path
+
+    def __contains__(self, video_id: str) -> bool:
+        return self.get(video_id) is not None
+
+    def add(self, path: str, video_id: Optional[str] = None):
+        """Records a downloaded file, reading the ID from its name if not given."""
+        with self._lock:
+            self._add(path, video_id)
+
+    @classmethod
+    def id_from_filename(cls, path: str) -> Optional[str]:
+        match = cls.FILENAME_ID_RE.search(os.path.basename(path))
+        return match.group(1) if match else None
+
+    def _on_library_change(self, upserted: List[str], removed: List[str]):
+        for path in removed:
+            self._forget(path)
+        with self._lock:
+            for path in upserted:
+                self._add(path)
+
+    def _add(self, path: str, video_id: Optional[str] = None):
+        video_id = video_id or self.id_from_filename(path)
+        if video_id:
+            self._paths[video_id] = path
+
+    def _forget(self, path: str, video_id: Optional[str] = None):
+        video_id = video_id or self.id_from_filename(path)
+        with self._lock:
+            # Another file may hold the ID by now
+            if video_id and self._paths.get(video_id) == path:
+                del self._paths[video_id]
+
+class ProgressAggregator:
+    """
+    Turns raw yt-dlp progress callbacks into throttled per-task updates.
+
+    Progress, speed and ETA come from the numeric byte counters. Every callback
+    updates the task's fields, but update() only asks for a publish at most
+    *rate_hz* times per second per task.
+    """
+    def __init__(self, rate_hz: float = 10.0, smoothing: float = 0.3):
+        self.min_interval = 1.0 / rate_hz
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._last: Dict[int, Tuple[float, int]] = {} # task id -> (time, bytes) at last publish
+
+    def update(self, task: DownloadTask, d: Dict[str, Any]) -> bool:
+        """Applies one progress callback. Returns True when it should be published."""
+        downloaded = d.get('downloaded_bytes') or 0
+        total = d.get('total_bytes') or d.get('total_bytes_estimate')
+        task.downloaded_bytes = downloaded
+        task.total_bytes = total
+        if total:
+            task.progress = min(100.0, downloaded * 100.0 / total)
+
+        now = time.monotonic()
+        with self._lock:
+            last = self._last.get(task.id)
+            if last is not None and now - last[0] < self.min_interval:
+                return False
+            self._last[task.id] = (now, downloaded)
+
+        if last is not None and downloaded >= last[1]:
+            rate = (downloaded - last[1]) / (now - last[0])
+            task.speed = rate if task.speed is None else task.speed + self.smoothing * (rate - task.speed)
+        if total and task.speed:
+            task.eta = max(0.0, (total - downloaded) / task.speed)
+        return True
+
+    def forget(self, task: DownloadTask):
+        with self._lock:
+            self._last.pop(task.id, None)
+
+class HostRateLimiter:
+    """Spaces out request starts per host so parallel workers don't burst one server."""
+    def __init__(self, min_interval: float = 0.5):
+        self.min_interval = min_interval
+        self._lock = threading.Lock()
+        self._next_slot: Dict[str, float] = {}
+
+    def wait(self, url: str):
+        """Blocks until the host of *url* may receive another request."""
+        host = urlparse(url).netloc.lower()
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot.get(host, 0.0))
+            self._next_slot[host] = slot + self.min_interval
+        if slot > now:
+            time.sleep(slot - now)
 
 class DownloadQueue:
-    def __init__(self, download_dir: str):
+    """
+    Parallel download workers with a durable journal.
+
+    Every queued task is journaled in the store until it completes or fails
+    for good, so unfinished downloads come back on the next start. yt-dlp keeps
+    partial data in .part files under stable names and resumes them with
+    Range requests; transient failures are retried with exponential backoff.
+    """
+    MAX_ATTEMPTS = 5
+    RETRY_BASE = 2.0 # Seconds before the first retry, doubled each time
+    RETRY_MAX = 120.0
+
+    def __init__(self, download_dir: str, pool: Optional[YDLPool] = None, workers: int = 3,
+                 postprocess_workers: int = 2, host_interval: float = 0.5, store: Optional[Store] = None,
+                 output_profile: str = OUTPUT_MP3, library: Optional[LibraryIndex] = None):
+        if output_profile not in OUTPUT_PROFILES:
+            raise ValueError(f"Unknown output profile: {output_profile}")
         self.download_dir = download_dir
+        self.output_profile = output_profile
+        self.pool = pool or YDLPool()
+        self.store = store
         self.queue = queue.Queue()
         self.tasks: List[DownloadTask] = [] # Keep track of all tasks
-        self.active_task: Optional[DownloadTask] = None
+        self.active_tasks: Set[DownloadTask] = set()
+        self._active_lock = threading.Lock()
         self._stop_event = threading.Event()
-        self._thread = threading.Thread(target=self._worker_loop, daemon=True)
-        self._thread.start()
+        self.rate_limiter = HostRateLimiter(host_interval)
+        if library is None:
+            library = LibraryIndex(download_dir, store)
+            threading.Thread(target=library.scan, daemon=True, name="library-scan").start()
+        self.index = VideoIndex(library)
+        # IDs pending or in flight, so the same video can't be queued twice
+        self._queued_ids: Set[str] = set()
+        
+        # FFmpeg conversion runs on its own pool so it never blocks the next fetch;
+        # postprocess_workers sets how many conversions run in parallel.
+        # The semaphore bounds the backlog: workers wait once it is full.
+        self._pp_executor = ThreadPoolExecutor(max_workers=postprocess_workers, thread_name_prefix="download-pp")
+        # One YoutubeDL per conversion thread (it only drives ffmpeg), so the
+        # shared pool's per-profile cap never limits conversion parallelism
+        self._pp_local = threading.local()
+        self._pp_slots = threading.BoundedSemaphore(postprocess_workers * 2)
+        
+        self._threads = [
+            threading.Thread(target=self._worker_loop, daemon=True, name=f"download-worker-{i}")
+            for i in range(max(1, workers))
+        ]
+        for thread in self._threads:
+            thread.start()
+        
+        # Change feed for the UI: task -> kinds ("added", "progress", "status"),
+        # coalesced until the next drain_changes()
+        self._changes: Dict[DownloadTask, Set[str]] = {}
+        self._changes_lock = threading.Lock()
+        self.progress = ProgressAggregator()
         
         # Callbacks for UI updates
         self.on_progress: Optional[Callable[[DownloadTask], None]] = None
         self.on_complete: Optional[Callable[[DownloadTask], None]] = None
         
+        self.restored = self._restore() # Tasks picked up from the journal
+        
     def add(self, url: str, title: str, playlist_name: str = None):
-        """Adds a song to the download queue. Returns None if already downloaded."""
+        """Adds a song to the download queue. Returns None if already downloaded or queued."""
         # Extract video ID from URL for duplicate detection
         video_id = self._extract_video_id(url)
         
-        if video_id and self.is_already_downloaded(video_id):
-            return None  # Already exists
+        if video_id:
+            if self.is_already_downloaded(video_id):
+                return None  # Already exists
+            with self._active_lock:
+                if video_id in self._queued_ids:
+                    return None  # Already pending or in flight
+                self._queued_ids.add(video_id)
         
         task = DownloadTask(url, title, playlist_name)
+        task.video_id = video_id
+        task.job_id = self._journal(self.store.add_download_job if self.store else None,
+                                    url, title, playlist_name, video_id, time.time())
+        self._enqueue(task)
+        return task
+
+    def _enqueue(self, task: DownloadTask):
         self.tasks.append(task)
+        self._emit(task, "added")
         self.queue.put(task)
-        return task
+
+    def _restore(self) -> int:
+        """Re-queues the journaled downloads of a previous run. Returns how many."""
+        jobs = self._journal(self.store.list_download_jobs if self.store else None) or []
+        restored = 0
+        for job in jobs:
+            video_id = job['video_id']
+            if video_id and (self.is_already_downloaded(video_id) or video_id in self._queued_ids):
+                self._journal(self.store.delete_download_job, job['id'])
+                continue
+            task = DownloadTask(job['url'], job['title'], job['playlist_name'])
+            task.video_id = video_id
+            task.job_id = job['id']
+            task.attempts = job['attempts']
+            if video_id:
+                self._queued_ids.add(video_id)
+            self._enqueue(task)
+            restored += 1
+        return restored
+
+    @staticmethod
+    def _journal(method: Optional[Callable], *args):
+        """Runs a journal write; the journal is best-effort and never fails a download."""
+        if method is None:
+            return None
+        try:
+            return method(*args)
+        except Exception:
+            return None
+
+    def drain_changes(self) -> List[Tuple[DownloadTask, Set[str]]]:
+        """Returns and clears the pending changes, one entry per affected task, in order."""
+        with self._changes_lock:
+            changes = list(self._changes.items())
+            self._changes.clear()
+        return changes
+
+    def _emit(self, task: DownloadTask, kind: str):
+        with self._changes_lock:
+            self._changes.setdefault(task, set()).add(kind)
+
+    def _set_status(self, task: DownloadTask, status: str):
+        task.status = status
+        self._emit(task, "status")
     
     def _extract_video_id(self, url: str) -> Optional[str]:
         """Extract YouTube video ID from URL."""
-        import re
         patterns = [
             r'(?:v=|/v/|youtu\.be/)([a-zA-Z0-9_-]{11})',
             r'(?:embed/)([a-zA-Z0-9_-]{11})',
@@ -57,15 +340,8 @@ class DownloadQueue:
         return None
     
     def is_already_downloaded(self, video_id: str) -> bool:
-        """Check if a video with this ID already exists in downloads."""
-        try:
-            for f in os.listdir(self.download_dir):
-                # Files are saved as "title_[videoId].mp3"
-                if f"[{video_id}]" in f:
-                    return True
-        except:
-            pass
-        return False
+        """Check if a video with this ID already exists anywhere in the library."""
+        return video_id in self.index
         
     def _worker_loop(self):
         while not self._stop_event.is_set():
@@ -75,40 +351,98 @@ class DownloadQueue:
                 continue
             
             try:
-                self.active_task = task
-                task.status = "downloading"
+                with self._active_lock:
+                    self.active_tasks.add(task)
+                self._set_status(task, "downloading")
                 
                 # Check for FFmpeg before starting
                 if not self.check_ffmpeg():
-                    task.status = "error"
+                    self._set_status(task, "error")
                     task.error_msg = "FFmpeg not found. Audio conversion will fail."
-                    if self.on_complete: self.on_complete(task)
-                    self.queue.task_done()
-                    self.active_task = None
+                    self._finish(task)
                     continue
                     
                 self._process_download(task)
-                self.queue.task_done()
-                self.active_task = None
             except Exception as e:
                 # Log any unexpected errors to file for debugging
-                task.status = "error"
+                self._set_status(task, "error")
                 task.error_msg = str(e)
                 with open("download_worker_error.txt", "a") as f:
                     f.write(f"Worker error: {e}\n")
-                if self.on_complete: self.on_complete(task)
+                self._finish(task)
+            finally:
                 try:
                     self.queue.task_done()
                 except:
                     pass
-                self.active_task = None
     
+    def _finish(self, task: DownloadTask):
+        """Marks a task as no longer active and reports its final state."""
+        if task.status == "completed" and task.filename:
+            self.index.add(task.filename, task.video_id)
+        if self.store and task.job_id is not None:
+            self._journal(self.store.delete_download_job, task.job_id)
+        self.progress.forget(task)
+        with self._active_lock:
+            self.active_tasks.discard(task)
+            self._queued_ids.discard(task.video_id)
+        if self.on_complete:
+            self.on_complete(task)
+
+    def _fail(self, task: DownloadTask, error: Exception):
+        """Schedules a retry with exponential backoff for transient errors, else fails the task."""
+        task.error_msg = str(error)
+        if self._stop_event.is_set():
+            return # Closing; the journal row stays so the download resumes next start
+        if task.attempts + 1 < self.MAX_ATTEMPTS and self._is_transient(error):
+            task.attempts += 1
+            delay = min(self.RETRY_MAX, self.RETRY_BASE ** task.attempts)
+            task.retry_at = time.time() + delay
+            if self.store and task.job_id is not None:
+                self._journal(self.store.set_download_attempts, task.job_id, task.attempts)
+            self.progress.forget(task)
+            with self._active_lock:
+                self.active_tasks.discard(task)
+            self._set_status(task, "retrying")
+            # The .part file stays on disk; the retry continues from its last byte
+            timer = threading.Timer(delay, self.queue.put, (task,))
+            timer.daemon = True
+            timer.start()
+            return
+        self._set_status(task, "error")
+        self._finish(task)
+
+    @staticmethod
+    def _is_transient(error: BaseException) -> bool:
+        """True for network-level failures worth retrying (timeouts, resets, 5xx, 429, short reads)."""
+        # yt-dlp wraps the real cause in DownloadError/ExtractorError; follow the chain
+        cause, depth = error, 0
+        while cause is not None and depth < 5:
+            if isinstance(cause, HTTPError):
+                return cause.status == 429 or cause.status >= 500
+            if isinstance(cause, (TransportError, ContentTooShortError, TimeoutError, ConnectionError)):
+                return True
+            exc_info = getattr(cause, 'exc_info', None)
+            cause = (exc_info[1] if exc_info else None) or getattr(cause, 'cause', None) or cause.__cause__
+            depth += 1
+        return False
+
     def check_ffmpeg(self) -> bool:
         """Checks if ffmpeg is available in the system path."""
         return shutil.which("ffmpeg") is not None
+
+    def close(self):
+        """
+        Stops the workers and drops queued conversions without waiting for them.
+
+        Unfinished tasks keep their journal rows, so they are picked up again
+        on the next start.
+        """
+        self._stop_event.set()
+        self._pp_executor.shutdown(wait=False, cancel_futures=True)
             
     def _process_download(self, task: DownloadTask):
-        """Downloads the video using yt-dlp."""
+        """Downloads the audio stream, then hands it to the post-processing pool."""
         
         # Determine output path
         output_dir = self.download_dir
@@ -116,121 +450,180 @@ class DownloadQueue:
             output_dir = os.path.join(output_dir, task.playlist_name)
             
         if not os.path.exists(output_dir):
-            os.makedirs(output_dir)
+            os.makedirs(output_dir, exist_ok=True)
             
-        # Configure yt-dlp
-        ydl_opts = {
-            'format': 'bestaudio/best',
-            'outtmpl': os.path.join(output_dir, '%(title)s_[%(id)s].%(ext)s'),
-            'quiet': True,
-            'progress_hooks': [lambda d: self._progress_hook(d, task)],
-            'postprocessors': [{
-                'key': 'FFmpegExtractAudio',
-                'preferredcodec': 'mp3',
-                'preferredquality': '192',
-            }],
-        }
-        
         try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                # Extract info and download
+            self.rate_limiter.wait(task.url)
+            # Output dir varies per playlist, so it is passed per checkout via 'paths'
+            with self.pool.checkout("download", progress_hook=lambda d: self._progress_hook(d, task),
+                                    paths={'home': output_dir}) as ydl:
+                # Extract info and download (conversion happens separately)
                 info = ydl.extract_info(task.url, download=True)
-                
-                # Predict the final filename after MP3 conversion
-                # yt-dlp prepare_filename gives the original, we swap extension to .mp3
-                base_path = ydl.prepare_filename(info)
-                final_filename = os.path.splitext(base_path)[0] + ".mp3"
-                
-                task.filename = final_filename
-                task.status = "completed"
-                task.progress = 100.0
-                
-                if self.on_complete:
-                    self.on_complete(task)
+                downloads = info.get('requested_downloads') or [{}]
+                info['filepath'] = downloads[0].get('filepath') or ydl.prepare_filename(info)
+                info['ext'] = os.path.splitext(info['filepath'])[1].lstrip('.')
         except Exception as e:
-            task.status = "error"
+            self._fail(task, e)
+            return
+
+        self._set_status(task, "converting")
+        self._pp_slots.acquire()
+        try:
+            future = self._pp_executor.submit(self._postprocess, task, info)
+        except RuntimeError:
+            # Closed meanwhile; the journal row stays and the next start
+            # finds the file already downloaded
+            self._pp_slots.release()
+            return
+        future.add_done_callback(lambda _: self._pp_slots.release())
+
+    def _postprocess(self, task: DownloadTask, info: Dict[str, Any]):
+        """Converts a downloaded file per the output profile on the post-processing pool."""
+        try:
+            # This thread's own time plus what ffmpeg reports for its runs
+            # (the short ffprobe codec check is not counted)
+            cpu_started = time.thread_time()
+            ydl = self._pp_ydl()
+            pp = make_postprocessor(ydl, self.output_profile)
+            info = ydl.run_pp(pp, info)
+            task.cpu_seconds = pp.ffmpeg_cpu + time.thread_time() - cpu_started
+            
+            task.filename = info['filepath']
+            self._set_status(task, "completed")
+            task.progress = 100.0
+        except Exception as e:
+            self._set_status(task, "error")
             task.error_msg = str(e)
-            if self.on_complete:
-                self.on_complete(task)
+        self._finish(task)
+
+    def _pp_ydl(self) -> "yt_dlp.YoutubeDL":
+        """This conversion thread's YoutubeDL, built on first use."""
+        ydl = getattr(self._pp_local, "ydl", None)
+        if ydl is None:
+            ydl = self._pp_local.ydl = yt_dlp.YoutubeDL({'quiet': True})
+        return ydl
 
     def _progress_hook(self, d, task):
         if d['status'] == 'downloading':
-            try:
-                p = d.get('_percent_str', '0%').replace('%','')
-                task.progress = float(p)
+            # Called many times a second; only throttled updates reach the UI
+            if self.progress.update(task, d):
+                self._emit(task, "progress")
                 if self.on_progress:
                     self.on_progress(task)
-            except:
-                pass
         elif d['status'] == 'finished':
             task.progress = 100.0
+            task.eta = 0.0
+            self.progress.forget(task)
+            self._emit(task, "progress")
 
 class MusicDownloader:
     # Kept for search functionality
-    def __init__(self):
-        self.ydl_opts = {
-            'format': 'bestaudio/best',
-            'quiet': True,
-            'extract_flat': 'in_playlist',
-            'noplaylist': True,
-        }
+    MAX_REDIRECTS = 3 # 'url' results followed before a playlist's entries are read
+    def __init__(self, search_cache: Optional[SearchCache] = None, pool: Optional[YDLPool] = None):
+        self.search_cache = search_cache or SearchCache()
+        self.pool = pool or YDLPool()
         
     def search(self, query: str, limit: int = 10) -> List[Dict[str, Any]]:
-        """Searches YouTube and returns results."""
-        search_opts = {
-            **self.ydl_opts,
-            'default_search': 'ytsearch',
-            'extract_flat': True,
-        }
-        
-        # If it's a URL, don't use ytsearch prefix
-        if query.startswith("http"):
-            search_query = query
-        else:
-            search_query = f"ytsearch{limit}:{query}"
-            
-        with yt_dlp.YoutubeDL(search_opts) as ydl:
+        """Searches YouTube and returns results, serving repeat queries from the cache."""
+        return list(self.iter_search(query, limit))
+
+    def iter_search(self, query: str, limit: int = 10, max_results: Optional[int] = None) -> Iterator[Dict[str, Any]]:
+        """
+        Yields search results one at a time as yt-dlp parses them.
+
+        The first *limit* results are cached once complete (a search abandoned
+        before that is not) and served from the cache next time. With
+        *max_results*, results keep coming past the first page: the extraction
+        stays lazy, so YouTube's continuation pages are only requested as the
+        consumer pulls, and earlier pages are not requested again within one
+        extraction. A cached first page has no continuation state to resume
+        from, though: pulling past it starts a new extraction that fetches
+        YouTube's first response again and skips the cached results.
+        """
+        cached = self.search_cache.get(query, limit)
+        if cached is not None:
+            yield from cached
+            if max_results is None or len(cached) < limit:
+                return
+        skip = len(cached) if cached is not None else 0
+
+        started = time.perf_counter()
+        first_page = []
+        for i, result in enumerate(self._iter_search_remote(query, max_results or limit)):
+            if i < skip:
+                continue # Served from the cache; YouTube's first response carries them anyway
+            if i < limit:
+                first_page.append(result)
+                if len(first_page) == limit:
+                    self.search_cache.put(query, limit, first_page, elapsed=time.perf_counter() - started)
+            yield result
+        if first_page and len(first_page) < limit:
+            self.search_cache.put(query, limit, first_page, elapsed=time.perf_counter() - started)
+
+    def _iter_search_remote(self, query: str, limit: int) -> Iterator[Dict[str, Any]]:
+        """Runs the yt-dlp search extraction."""
+        with self.pool.checkout("search") as ydl:
             try:
-                result = ydl.extract_info(search_query, download=False)
-                if 'entries' in result:
-                    return list(result['entries'])
-                elif 'title' in result: # Single video URL result
-                    return [result]
+                # If it's a URL, don't use ytsearch prefix
+                if query.startswith("http"):
+                    result = ydl.extract_info(query, download=False)
+                    if 'entries' in result:
+                        yield from result['entries']
+                    elif 'title' in result: # Single video URL result
+                        yield result
+                    return
+                # process=False keeps the entries lazy, so each is available as soon as it is parsed
+                result = ydl.extract_info(f"ytsearch{limit}:{query}", download=False, process=False)
+                for entry in itertools.islice((result or {}).get('entries') or [], limit):
+                    if entry:
+                        yield entry
             except Exception as e:
                 print(f"Error searching: {e}")
-                return []
-        return []
 
     def extract_playlist(self, playlist_url: str) -> List[Dict[str, Any]]:
         """Extracts videos from a YouTube playlist URL."""
-        opts = {
-            'extract_flat': True,
-            'quiet': True,
-            'ignoreerrors': True,
-        }
-        
-        with yt_dlp.YoutubeDL(opts) as ydl:
+        return [entry for page in self.iter_playlist(playlist_url) for entry in page]
+
+    def iter_playlist(self, playlist_url: str, page_size: int = 100,
+                      raise_errors: bool = False) -> Iterator[List[Dict[str, Any]]]:
+        """
+        Yields a playlist's videos page by page as yt-dlp fetches them.
+
+        With process=False the extractor's entries stay lazy, so the first page
+        is available before later pages have been requested. An extraction
+        error ends the pages early; with *raise_errors* it is re-raised after
+        the last page, so callers can tell a partial playlist from a complete one.
+        """
+        error = None
+        with self.pool.checkout("flat-playlist") as ydl:
+            page = []
             try:
-                result = ydl.extract_info(playlist_url, download=False)
-                if 'entries' in result:
+                result = ydl.extract_info(playlist_url, download=False, process=False)
+                # Unprocessed results leave redirects (watch?list= without v=, youtu.be
+                # ?list= links, channel redirects) to the caller
+                for _ in range(self.MAX_REDIRECTS):
+                    if (result or {}).get('_type') not in ('url', 'url_transparent'):
+                        break
+                    result = ydl.extract_info(result['url'], download=False, process=False,
+                                              ie_key=result.get('ie_key'))
+                for entry in (result or {}).get('entries') or []:
                     # Filter out private/deleted videos (usually have no title or id)
-                    valid_entries = [
-                        entry for entry in result['entries'] 
-                        if entry.get('title') and entry.get('id')
-                    ]
-                    return valid_entries
+                    if entry and entry.get('title') and entry.get('id'):
+                        page.append(entry)
+                    if len(page) >= page_size:
+                        yield page
+                        page = []
             except Exception as e:
                 print(f"Error extracting playlist: {e}")
-                return []
-        return []
+                error = e
+            if page:
+                yield page
+        if error is not None and raise_errors:
+            raise error
 
     def get_stream_url(self, video_url: str) -> str:
         """Gets the direct stream URL for a video."""
-        opts = {
-            'format': 'bestaudio/best',
-            'quiet': True,
-        }
-        with yt_dlp.YoutubeDL(opts) as ydl:
+        with self.pool.checkout("stream-resolve") as ydl:
             try:
                 info = ydl.extract_info(video_url, download=False)
                 return info['url']
@@ -240,3 +633,71 @@ class MusicDownloader:
     def check_ffmpeg(self) -> bool:
         """Checks if ffmpeg is available in the system path."""
         return shutil.which("ffmpeg") is not None
+
+class StreamResolver:
+    """Pre-resolves direct audio URLs for upcoming tracks in the background."""
+    DEFAULT_TTL = 3600       # Used when the stream URL carries no 'expire' param
+    EXPIRY_MARGIN = 60       # Treat URLs as stale a minute before they expire
+    MAX_ENTRIES = 64
+
+    def __init__(self, downloader: MusicDownloader, workers: int = 2):
+        self.downloader = downloader
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="stream-resolver")
+        self._lock = threading.Lock()
+        self._cache: Dict[str, tuple] = {}       # watch URL -> (stream URL, expires_at)
+        self._inflight: Dict[str, Future] = {}
+
+    def prefetch(self, urls: List[str]):
+        """Starts resolving any of *urls* that are not cached or already in flight."""
+        with self._lock:
+            for url in urls:
+                if url in self._inflight or self._cached(url):
+                    continue
+                try:
+                    self._inflight[url] = self._executor.submit(self._resolve, url)
+                except RuntimeError:
+                    return # Closed
+
+    def get(self, url: str, timeout: float = 0.0) -> Optional[str]:
+        """Returns the resolved stream URL for *url*, waiting up to *timeout* if in flight."""
+        with self._lock:
+            stream_url = self._cached(url)
+            future = self._inflight.get(url)
+        if stream_url or future is None:
+            return stream_url
+
+        try:
+            return future.result(timeout=timeout)
+        except Exception:
+            return None
+
+    def close(self):
+        """Drops pending resolutions without waiting for the running ones."""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+    def _cached(self, url: str) -> Optional[str]:
+        entry = self._cache.get(url)
+        if entry and entry[1] - self.EXPIRY_MARGIN > time.time():
+            return entry[0]
+        return None
+
+    def _resolve(self, url: str) -> Optional[str]:
+        stream_url = None
+        try:
+            stream_url = self.downloader.get_stream_url(url)
+        finally:
+            with self._lock:
+                if stream_url:
+                    self._cache[url] = (stream_url, self._expiry_of(stream_url))
+                    # Evict the oldest entries once the cache is full
+                    while len(self._cache) > self.MAX_ENTRIES:
+                        self._cache.pop(next(iter(self._cache)))
+                self._inflight.pop(url, None)
+        return stream_url
+
+    def _expiry_of(self, stream_url: str) -> float:
+        """Reads the expiry timestamp googlevideo embeds in stream URLs."""
+        try:
+            return float(parse_qs(urlparse(stream_url).query)["expire"][0])
+        except (KeyError, IndexError, ValueError):
+            return time.time() + self.DEFAULT_TTL
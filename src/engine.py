@@ -4,12 +4,23 @@ import shutil
 import uuid
 import subprocess
 import os
-from typing import Optional, Callable, Dict, Any
+from typing import Optional, Callable, Dict, Any, List, Tuple
 from python_mpv_jsonipc import MPV
 from .config import get_mpv_path, get_app_data_dir
+from .ipc import IPCChannel
 
 class AudioEngine:
-    def __init__(self):
+    # MPV properties mirrored into the status snapshot, mapped to snapshot keys
+    OBSERVED_PROPERTIES = {
+        "pause": "paused",
+        "time-pos": "position",
+        "duration": "duration",
+        "media-title": "title",
+        "volume": "volume",
+    }
+
+    def __init__(self, gapless: bool = True):
+        self.gapless = gapless
         self.mpv_path = get_mpv_path()
         if not self.mpv_path:
             raise RuntimeError("mpv is not installed or not in PATH.")
@@ -65,6 +76,10 @@ class AudioEngine:
         if os.name == 'nt':
             mpv_args.append("--ao=wasapi")
         
+        # Let MPV open the next playlist entry before the current one ends
+        if self.gapless:
+            mpv_args.append("--prefetch-playlist")
+        
         if ytdl_path:
             mpv_args.append(f"--script-opts=ytdl_hook-ytdl_path={ytdl_path}")
             
@@ -80,7 +95,10 @@ class AudioEngine:
         while time.time() - start_time < 3.0: # Try for 3 seconds
             try:
                 # Connection library to the existing process
-                self.mpv = MPV(start_mpv=False, ipc_socket=ipc_socket_arg)
+                if not hasattr(self, 'mpv'):
+                    self.mpv = MPV(start_mpv=False, ipc_socket=ipc_socket_arg)
+                # Second connection used for pipelined commands
+                self.ipc = IPCChannel(ipc_socket_arg)
                 connected = True
                 break
             except Exception:
@@ -105,53 +123,120 @@ class AudioEngine:
         self.ignore_events_until = 0.0
         self.on_track_end: Optional[Callable[[str], None]] = None
         self.on_error: Optional[Callable[[str], None]] = None
+        self.on_track_advance: Optional[Callable[[], None]] = None
+        # Called with the reason for every natural end ('eof'/'error'), gapless advances
+        # included, and the last position the ended file reached
+        self.on_file_ended: Optional[Callable[[str, Optional[float]], None]] = None
+        
+        # Gapless mode: (url, title) entries mirrored from MPV's own playlist,
+        # holding at most the current track and the one appended after it
+        self._playlist_lock = threading.Lock()
+        self._mpv_playlist: List[Tuple[str, Optional[str]]] = []
+        
+        # Track-to-track latency: time from play() until audio actually restarts
+        self._load_started_at: Optional[float] = None
+        self._pending_seek: Optional[float] = None
+        self.last_start_latency: Optional[float] = None
+        
+        # Status snapshot kept current by MPV property-change events
+        self._status_lock = threading.Lock()
+        self._status = self._default_status()
+        # Last real time-pos of the loaded file; the snapshot reads 0 once mpv unloads it
+        self._last_position: Optional[float] = None
         
         # Bind events
         self.mpv.bind_event("end-file", self._on_end_file)
+        self.mpv.bind_event("playback-restart", self._on_playback_restart)
         
-    def play(self, url: str):
-        """Plays a URL (stream or local file)."""
+        # Observe status properties once instead of polling them
+        for prop in self.OBSERVED_PROPERTIES:
+            try:
+                self.mpv.bind_property_observer(prop, self._on_property_change)
+            except Exception:
+                pass
+        if self.gapless:
+            self.mpv.bind_property_observer("playlist-pos", self._on_playlist_pos)
+        
+    def play(self, url: str, title: Optional[str] = None, start: Optional[float] = None, paused: bool = False):
+        """Plays a URL (stream or local file).
+
+        *title* overrides the media title, which matters for pre-resolved
+        stream URLs that carry no metadata of their own. *start* seeks to an
+        offset (seconds) once the file is loaded; *paused* loads it paused.
+        """
         # Briefly ignore events to avoid the 'redirect/stop' from loading a new file
         self.ignore_events_until = time.time() + 0.2
+        self._load_started_at = time.perf_counter()
+        self._pending_seek = start or None
+        with self._playlist_lock:
+            self._mpv_playlist = [(url, title)]
         
+        commands = [("set_property", "force-media-title", title or "")]
+        if paused:
+            commands.append(("set_property", "pause", True))
+        commands.append(("loadfile", url))
         try:
-            # Check if it's already playing this URL to avoid restart?
-            # For now, just play
-            self.mpv.play(url)
+            # Title and load go out in a single write
+            self.ipc.batch(commands)
         except Exception as e:
             if self.on_error:
                 self.on_error(str(e))
 
     def pause(self):
         """Toggles pause."""
+        # Fire-and-forget: silent fail is expected if MPV is not ready
+        self._send("cycle", "pause")
+
+    def queue_next(self, url: Optional[str], title: Optional[str] = None):
+        """Appends *url* to MPV's playlist so it starts gaplessly after the current track.
+
+        Passing None drops any previously queued track.
+        """
+        if not self.gapless:
+            return
+
+        with self._playlist_lock:
+            if not self._mpv_playlist:
+                return # Nothing playing to follow
+            if url and self._mpv_playlist[1:] == [(url, title)]:
+                return # Already queued
+            commands = [("playlist-clear",)]
+            self._mpv_playlist = self._mpv_playlist[:1]
+            if url:
+                commands.append(("loadfile", url, "append"))
+                self._mpv_playlist.append((url, title))
+
         try:
-            self.mpv.command("cycle", "pause")
-        except Exception as e:
-            pass # Silent fail is expected if MPV is not ready
+            self.ipc.submit_batch(commands)
+        except Exception:
+            pass
 
     def stop(self):
         """Stops playback."""
-        try:
-            self.mpv.command("stop")
-        except Exception as e:
-            pass
+        with self._playlist_lock:
+            self._mpv_playlist = []
+        self._send("stop")
             
     def set_volume(self, volume: int):
         """Sets volume (0-100)."""
-        try:
-            self.mpv.command("set_property", "volume", volume)
-        except Exception:
-            pass
+        self._send("set_property", "volume", volume)
 
     def change_volume(self, delta: int):
         """Changes volume by delta (e.g., 5 or -5)."""
+        self._send("add", "volume", delta)
+
+    def _send(self, command: str, *args):
+        """Queues a command on the pipelined channel without waiting for the reply."""
         try:
-            self.mpv.command("add", "volume", delta)
+            self.ipc.submit(command, *args)
         except Exception:
             pass
 
     def quit(self):
         """Terminates the MPV process and cleans up IPC."""
+        if hasattr(self, 'ipc'):
+            self.ipc.close()
+
         if hasattr(self, 'mpv'):
             try:
                 self.mpv.terminate()
@@ -183,35 +268,69 @@ class AudioEngine:
                 pass
             
     def get_status(self) -> Dict[str, Any]:
-        """Returns playback status."""
-        if not hasattr(self, 'mpv'):
-            return {"paused": True, "position": 0, "duration": 0, "title": "Stopped", "volume": 100}
+        """Returns the cached playback status snapshot (no IPC round-trips)."""
+        if not hasattr(self, '_status'):
+            return self._default_status()
+
+        with self._status_lock:
+            return dict(self._status)
+
+    @staticmethod
+    def _default_status() -> Dict[str, Any]:
+        return {"paused": True, "position": 0.0, "duration": 0.0, "title": "Stopped", "volume": 100}
+
+    def _on_property_change(self, name: str, value: Any):
+        """Updates the status snapshot from an MPV property-change event."""
+        key = self.OBSERVED_PROPERTIES.get(name)
+        if key is None:
+            return
 
         try:
-            # Fetch properties individually for maximum library compatibility
-            props = ["pause", "time-pos", "duration", "media-title", "volume"]
-            p = {}
-            for prop in props:
-                try:
-                    p[prop] = self.mpv.get_property(prop)
-                except:
-                    p[prop] = None
+            if key == "paused":
+                value = bool(value)
+            elif key in ("position", "duration"):
+                value = float(value or 0)
+            elif key == "title":
+                value = value or "Stopped"
+            elif key == "volume":
+                value = int(value) if value is not None else 100
+        except (TypeError, ValueError):
+            return
 
-            return {
-                "paused": p.get("pause", False) or False,
-                "position": float(p.get("time-pos", 0) or 0),
-                "duration": float(p.get("duration", 0) or 0),
-                "title": p.get("media-title", None) or "Stopped",
-                "volume": int(p.get("volume", 100) or 100),
-            }
-        except Exception:
-            return {
-                "paused": True,
-                "position": 0,
-                "duration": 0,
-                "title": "Stopped",
-                "volume": 100
-            }
+        with self._status_lock:
+            self._status[key] = value
+            if name == "time-pos" and value:
+                self._last_position = value
+
+    def _on_playback_restart(self, event_data):
+        """Records how long the last loaded track took to start playing."""
+        # Resume offset: seeking once the file is up works on every mpv version,
+        # unlike per-file loadfile options
+        seek, self._pending_seek = self._pending_seek, None
+        if seek:
+            self._send("seek", seek, "absolute")
+        started_at = self._load_started_at
+        if started_at is not None:
+            self._load_started_at = None
+            self.last_start_latency = time.perf_counter() - started_at
+
+    def _on_playlist_pos(self, name: str, pos: Any):
+        """Detects MPV advancing onto the appended track by itself."""
+        # Only a move onto the second entry is an advance; the 1 -> 0 shift
+        # caused by queue_next()'s playlist-clear is not.
+        if pos != 1:
+            return
+
+        with self._playlist_lock:
+            if len(self._mpv_playlist) < 2:
+                return
+            self._mpv_playlist = self._mpv_playlist[1:]
+            url, title = self._mpv_playlist[0]
+
+        self._load_started_at = time.perf_counter()
+        self._send("set_property", "force-media-title", title or "")
+        if self.on_track_advance:
+            self.on_track_advance()
 
     def _on_end_file(self, event_data):
         """Handles track end events."""
@@ -219,11 +338,18 @@ class AudioEngine:
             return
 
         reason = event_data.get("reason", "unknown")
+        with self._status_lock:
+            position, self._last_position = self._last_position, None
+        with self._playlist_lock:
+            # MPV moves on to the appended track itself; _on_playlist_pos reports it
+            advancing = len(self._mpv_playlist) > 1
         
         # 'eof' means natural end, 'error' means stream failed
         # 'stop' can also happen if the file is very short/weird
         if reason in ("eof", "error"):
-            if self.on_track_end:
+            if self.on_file_ended:
+                self.on_file_ended(reason, position)
+            if self.on_track_end and not advancing:
                 self.on_track_end(reason)
             if reason == "error" and self.on_error:
                 self.on_error("MPV Playback Error")
@@ -0,0 +1,122 @@
+import heapq
+import threading
+from array import array
+from typing import Dict, List, Optional, Tuple
+
+from .store import Store
+
+# End reasons recorded with each play event
+END_EOF = "eof"     # Played to the end
+END_SKIP = "skip"   # User moved to another track
+END_STOP = "stop"   # Queue cleared or app closed
+END_ERROR = "error" # Stream failed
+
+class PlayHistory:
+    """
+    Append-only play-event log with in-memory aggregates.
+
+    Events are queued by record() and written to the store in batches by a
+    background thread, so the UI thread never touches the database. Per-track
+    aggregates live in flat arrays indexed by an interned track number, which
+    keeps a million events' worth of stats compact and the queries cheap.
+    """
+    FLUSH_INTERVAL = 2.0
+
+    def __init__(self, store: Store):
+        self.store = store
+        self.ready = threading.Event() # Set once stored events are folded in
+        self._lock = threading.Lock()
+        self._ids: Dict[str, int] = {}
+        self._track_ids: List[str] = []
+        self._plays = array('I')
+        self._skips = array('I')
+        self._last_played = array('d')
+
+        self._cond = threading.Condition()
+        self._pending: List[Tuple[str, float, float, Optional[float], Optional[str]]] = []
+        self._closing = False
+        self._writer = threading.Thread(target=self._run, daemon=True, name="history-writer")
+        self._writer.start()
+
+    def record(self, track_id: str, started_at: float, ended_at: float,
+               position: Optional[float], end_reason: str):
+        """Logs one finished play. Cheap enough to call from the UI thread."""
+        event = (track_id, started_at, ended_at, position, end_reason)
+        with self._lock:
+            self._fold(event)
+        with self._cond:
+            self._pending.append(event)
+
+    def play_count(self, track_id: str) -> int:
+        with self._lock:
+            idx = self._ids.get(track_id)
+            return self._plays[idx] if idx is not None else 0
+
+    def skip_rate(self, track_id: str) -> Optional[float]:
+        """Fraction of plays that were skipped, or None if never played."""
+        with self._lock:
+            idx = self._ids.get(track_id)
+            if idx is None or not self._plays[idx]:
+                return None
+            return self._skips[idx] / self._plays[idx]
+
+    def most_played(self, n: int = 10) -> List[Tuple[str, int]]:
+        """Returns up to *n* (track_id, play count) pairs, most played first."""
+        with self._lock:
+            top = heapq.nlargest(n, range(len(self._plays)), key=self._plays.__getitem__)
+            return [(self._track_ids[i], self._plays[i]) for i in top]
+
+    def recently_played(self, n: int = 10) -> List[Tuple[str, float]]:
+        """Returns up to *n* (track_id, last end time) pairs, most recent first."""
+        with self._lock:
+            top = heapq.nlargest(n, range(len(self._last_played)), key=self._last_played.__getitem__)
+            return [(self._track_ids[i], self._last_played[i]) for i in top]
+
+    def close(self):
+        """Flushes pending events and stops the writer."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._writer.join(timeout=5)
+
+    def _fold(self, event):
+        """Adds one event to the aggregates. Caller holds _lock."""
+        track_id, _, ended_at, _, end_reason = event
+        idx = self._ids.get(track_id)
+        if idx is None:
+            idx = self._ids[track_id] = len(self._track_ids)
+            self._track_ids.append(track_id)
+            self._plays.append(0)
+            self._skips.append(0)
+            self._last_played.append(0.0)
+        self._plays[idx] += 1
+        if end_reason == END_SKIP:
+            self._skips[idx] += 1
+        if ended_at > self._last_played[idx]:
+            self._last_played[idx] = ended_at
+
+    def _run(self):
+        # Fold the stored log first; events recorded meanwhile stay pending,
+        # so nothing is read back from the store and counted twice
+        try:
+            for batch in self.store.iter_play_events():
+                with self._lock:
+                    for event in batch:
+                        self._fold(event)
+        except Exception:
+            pass # History is best-effort; playback never depends on it
+        self.ready.set()
+
+        while True:
+            with self._cond:
+                # Let a batch accumulate; close() cuts the wait short
+                self._cond.wait_for(lambda: self._closing, timeout=self.FLUSH_INTERVAL)
+                batch, self._pending = self._pending, []
+                closing = self._closing
+            if batch:
+                try:
+                    self.store.append_play_events(batch)
+                except Exception:
+                    pass
+            if closing:
+                return
@@ -0,0 +1,149 @@
+import json
+import os
+import threading
+from concurrent.futures import Future, TimeoutError
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+from python_mpv_jsonipc import MPVError, UnixSocket, WindowsSocket
+
+Command = Tuple[Any, ...]
+
+class IPCChannel:
+    """
+    Pipelined JSON IPC connection to MPV.
+
+    Every command is tagged with a request_id and written without waiting for
+    earlier replies; the transport's reader thread matches responses back to
+    their pending futures. Any number of commands can be in flight at once.
+    """
+    def __init__(self, ipc_socket: str, on_event: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 timeout: float = 5.0):
+        self.timeout = timeout
+        self.on_event = on_event
+        self._next_id = 1
+        self._id_lock = threading.Lock()
+        self._write_lock = threading.Lock()
+        self._pending: Dict[int, Future] = {}
+        self._closed = False
+
+        Socket = WindowsSocket if os.name == 'nt' else UnixSocket
+        self._transport = Socket(ipc_socket, self._on_message, self._on_disconnect)
+        self._transport.start()
+
+    def submit(self, command: str, *args) -> Future:
+        """Sends a command without blocking. Returns a Future for its result."""
+        return self.submit_batch([(command, *args)])[0]
+
+    def submit_batch(self, commands: Sequence[Command]) -> List[Future]:
+        """Sends several commands in a single write. Returns one Future per command."""
+        futures = []
+        messages = []
+        with self._id_lock:
+            for cmd in commands:
+                request_id = self._next_id
+                self._next_id += 1
+                future = Future()
+                future.request_id = request_id
+                self._pending[request_id] = future
+                futures.append(future)
+                messages.append({"command": list(cmd), "request_id": request_id})
+
+        try:
+            self._write(messages)
+        except Exception as e:
+            for msg in messages:
+                future = self._pending.pop(msg["request_id"], None)
+                if future and not future.done():
+                    future.set_exception(e)
+        return futures
+
+    def command(self, command: str, *args) -> Any:
+        """Sends a command and blocks until its reply arrives."""
+        future = self.submit(command, *args)
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            self._drop([future])
+            raise
+
+    def batch(self, commands: Sequence[Command]) -> List[Any]:
+        """Sends several commands in one write and returns their results in order."""
+        futures = self.submit_batch(commands)
+        try:
+            return [f.result(timeout=self.timeout) for f in futures]
+        except TimeoutError:
+            self._drop(futures)
+            raise
+
+    def get_properties(self, names: Sequence[str]) -> Dict[str, Any]:
+        """Reads several properties in one round-trip. Failed reads map to None."""
+        futures = self.submit_batch([("get_property", name) for name in names])
+        values = {}
+        for name, future in zip(names, futures):
+            try:
+                values[name] = future.result(timeout=self.timeout)
+            except TimeoutError:
+                self._drop([future])
+                values[name] = None
+            except Exception:
+                values[name] = None
+        return values
+
+    def close(self):
+        """Closes the connection and fails any commands still in flight."""
+        self._closed = True
+        try:
+            self._transport.stop(join=False)
+        except Exception:
+            pass
+        self._fail_pending(BrokenPipeError("IPC channel closed"))
+
+    def _write(self, messages: List[Dict[str, Any]]):
+        if self._closed:
+            raise BrokenPipeError("IPC channel closed")
+
+        with self._write_lock:
+            sock = getattr(self._transport, "socket", None)
+            if sock is not None:
+                blob = b"".join(json.dumps(m).encode('utf-8') + b'\n' for m in messages)
+                sock.sendall(blob)
+            else:
+                # Named pipes only expose a per-message send; replies are still pipelined
+                for msg in messages:
+                    self._transport.send(msg)
+
+    def _on_message(self, data: Dict[str, Any]):
+        request_id = data.get("request_id")
+        if request_id is not None:
+            future = self._pending.pop(request_id, None)
+            if future is None or future.done():
+                return
+            error = data.get("error")
+            if error == "success":
+                future.set_result(data.get("data"))
+            elif error == "property unavailable":
+                future.set_result(None)
+            else:
+                future.set_exception(MPVError(error))
+        elif "event" in data and self.on_event:
+            self.on_event(data)
+
+    def _on_disconnect(self):
+        self._closed = True
+        self._fail_pending(BrokenPipeError("MPV IPC connection lost"))
+
+    def _drop(self, futures: List[Future]):
+        """Stops waiting for replies that timed out; a late reply is then ignored."""
+        with self._id_lock:
+            for future in futures:
+                self._pending.pop(future.request_id, None)
+        for future in futures:
+            future.cancel()
+
+    def _fail_pending(self, error: Exception):
+        with self._id_lock:
+            pending = list(self._pending.values())
+            self._pending.clear()
+        for future in pending:
+            if not future.done():
+                future.set_exception(error)
@@ -0,0 +1,372 @@
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from .config import get_app_data_dir
+from .store import Store
+
+try:
+    import mutagen
+except ImportError: # Metadata is optional; the index still tracks files without it
+    mutagen = None
+
+AUDIO_EXTS = (".mp3", ".m4a", ".webm", ".opus")
+TAG_FIELDS = ("title", "artist", "album")
+
+ChangeCallback = Callable[[List[str], List[str]], None]
+
+class LibraryIndex:
+    """
+    On-disk index of the download library: path -> mtime, size, duration and tags.
+
+    A full scan only re-reads metadata for files whose mtime or size changed.
+    After that, a watcher (inotify on Linux, directory mtime diffing elsewhere)
+    feeds individual paths to update_paths(), so one new download touches one file.
+    """
+    SAVE_DELAY = 2.0 # Coalesce index writes
+
+    def __init__(self, root_dir: str, store: Optional[Store] = None, filename: str = "library_index.json"):
+        self.root_dir = str(root_dir)
+        self.store = store or Store()
+        self._listeners: List[ChangeCallback] = []
+        self._lock = threading.RLock()
+        self._entries: Dict[str, Dict[str, Any]] = self._load(filename)
+        # Paths changed since the last write; only these rows are written
+        self._dirty: set = set()
+        self._save_timer: Optional[threading.Timer] = None
+        self._watcher = None
+
+    def paths(self) -> List[str]:
+        """Returns all indexed paths, sorted."""
+        with self._lock:
+            return sorted(self._entries)
+
+    def add_listener(self, callback: ChangeCallback):
+        """Calls *callback(upserted, removed)* after every change, on the thread that made it."""
+        self._listeners.append(callback)
+
+    def get(self, path: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(path)
+            return dict(entry) if entry else None
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def scan(self) -> Tuple[List[str], List[str]]:
+        """Reconciles the index with a recursive walk. Returns (upserted, removed) paths."""
+        seen = {}
+        for dirpath, _, filenames in os.walk(self.root_dir):
+            for f in filenames:
+                if f.endswith(AUDIO_EXTS):
+                    path = os.path.join(dirpath, f)
+                    try:
+                        seen[path] = os.stat(path)
+                    except OSError:
+                        continue
+
+        with self._lock:
+            removed = [p for p in self._entries if p not in seen]
+            for path in removed:
+                del self._entries[path]
+            upserted = [p for p, st in seen.items() if self._upsert(p, st)]
+            self._dirty.update(removed)
+
+        self._changed(upserted, removed)
+        return upserted, removed
+
+    def update_paths(self, paths: List[str]) -> Tuple[List[str], List[str]]:
+        """Re-checks specific files only. Returns (upserted, removed) paths."""
+        upserted, removed = [], []
+        with self._lock:
+            for path in paths:
+                if not path.endswith(AUDIO_EXTS):
+                    continue
+                try:
+                    st = os.stat(path)
+                except OSError:
+                    if self._entries.pop(path, None) is not None:
+                        removed.append(path)
+                        self._dirty.add(path)
+                    continue
+                if self._upsert(path, st):
+                    upserted.append(path)
+
+        self._changed(upserted, removed)
+        return upserted, removed
+
+    def remove_tree(self, dirpath: str) -> List[str]:
+        """Drops every entry under a directory that was deleted or moved away."""
+        prefix = os.path.join(dirpath, "")
+        with self._lock:
+            removed = [p for p in self._entries if p.startswith(prefix)]
+            for path in removed:
+                del self._entries[path]
+            self._dirty.update(removed)
+        self._changed([], removed)
+        return removed
+
+    def start_watching(self):
+        """Starts the filesystem watcher once."""
+        if self._watcher:
+            return
+        watcher = None
+        if sys.platform.startswith("linux"):
+            try:
+                watcher = InotifyWatcher(self)
+            except OSError:
+                watcher = None
+        self._watcher = watcher or PollingWatcher(self)
+        self._watcher.start()
+
+    def close(self):
+        if self._watcher:
+            self._watcher.stop()
+        with self._lock:
+            if self._save_timer:
+                self._save_timer.cancel()
+                self._save_timer = None
+        self._save()
+
+    def _upsert(self, path: str, st: os.stat_result) -> bool:
+        """Updates one entry from its stat result. Returns True if it changed."""
+        entry = self._entries.get(path)
+        if entry and entry["mtime"] == st.st_mtime and entry["size"] == st.st_size:
+            return False
+        entry = {"mtime": st.st_mtime, "size": st.st_size}
+        entry.update(self._read_metadata(path))
+        self._entries[path] = entry
+        self._dirty.add(path)
+        return True
+
+    @staticmethod
+    def _read_metadata(path: str) -> Dict[str, Any]:
+        meta: Dict[str, Any] = {"duration": None}
+        if mutagen is None:
+            return meta
+        try:
+            audio = mutagen.File(path, easy=True)
+        except Exception:
+            return meta
+        if audio is None:
+            return meta
+        if getattr(audio, "info", None) is not None:
+            meta["duration"] = getattr(audio.info, "length", None)
+        if audio.tags:
+            for field in TAG_FIELDS:
+                values = audio.tags.get(field)
+                if values:
+                    meta[field] = str(values[0])
+        return meta
+
+    def _changed(self, upserted: List[str], removed: List[str]):
+        if not upserted and not removed:
+            return
+        self._schedule_save()
+        for callback in self._listeners:
+            callback(upserted, removed)
+
+    def _schedule_save(self):
+        with self._lock:
+            if self._save_timer is None:
+                self._save_timer = threading.Timer(self.SAVE_DELAY, self._flush)
+                self._save_timer.daemon = True
+                self._save_timer.start()
+
+    def _flush(self):
+        with self._lock:
+            self._save_timer = None
+        self._save()
+
+    def _load(self, filename: str) -> Dict[str, Dict[str, Any]]:
+        if self.store.get_meta("library_root") != self.root_dir:
+            # First run on the store, or the downloads folder moved: start over,
+            # importing the old JSON index once if it matches this root
+            self.store.clear_library()
+            entries = self._load_json(get_app_data_dir() / filename)
+            self.store.write_library(entries, [])
+            self.store.set_meta("library_root", self.root_dir)
+            return entries
+        return self.store.load_library()
+
+    def _load_json(self, filepath) -> Dict[str, Dict[str, Any]]:
+        try:
+            with open(filepath, 'r') as f:
+                data = json.load(f)
+            if data.get("root") == self.root_dir:
+                return data.get("entries", {})
+        except (json.JSONDecodeError, FileNotFoundError, OSError, AttributeError):
+            pass
+        return {}
+
+    def _save(self):
+        with self._lock:
+            dirty, self._dirty = self._dirty, set()
+            upserted = {p: dict(self._entries[p]) for p in dirty if p in self._entries}
+            removed = [p for p in dirty if p not in self._entries]
+        if not upserted and not removed:
+            return
+        try:
+            self.store.write_library(upserted, removed)
+        except Exception:
+            with self._lock:
+                self._dirty.update(dirty) # Retry with the next write
+
+class InotifyWatcher(threading.Thread):
+    """Recursive inotify watcher (Linux). Batches events and feeds them to the index."""
+    IN_CLOSE_WRITE = 0x8
+    IN_MOVED_FROM = 0x40
+    IN_MOVED_TO = 0x80
+    IN_CREATE = 0x100
+    IN_DELETE = 0x200
+    IN_DELETE_SELF = 0x400
+    IN_Q_OVERFLOW = 0x4000
+    IN_IGNORED = 0x8000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+    EVENT_HEADER = struct.Struct("iIII")
+    BATCH_WINDOW = 0.3 # Seconds to collect events before applying them
+
+    def __init__(self, index: LibraryIndex):
+        super().__init__(daemon=True, name="library-inotify")
+        self.index = index
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._fd = self._libc.inotify_init1(os.O_CLOEXEC | os.O_NONBLOCK)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs: Dict[int, str] = {}
+        self._stopping = False
+        self._add_tree(index.root_dir)
+
+    def stop(self):
+        self._stopping = True
+
+    def _add_tree(self, root: str):
+        for dirpath, _, _ in os.walk(root):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(dirpath), self.WATCH_MASK)
+            if wd >= 0:
+                self._dirs[wd] = dirpath
+
+    def run(self):
+        try:
+            while not self._stopping:
+                ready, _, _ = select.select([self._fd], [], [], 1.0)
+                if not ready:
+                    continue
+                # Let a burst of events settle, then apply them in one batch
+                time.sleep(self.BATCH_WINDOW)
+                self._process(self._read_all())
+        finally:
+            os.close(self._fd)
+
+    def _read_all(self) -> bytes:
+        chunks = []
+        while True:
+            try:
+                chunk = os.read(self._fd, 65536)
+            except BlockingIOError:
+                break
+            if not chunk:
+                break
+            chunks.append(chunk)
+        return b"".join(chunks)
+
+    def _process(self, buf: bytes):
+        paths = set()
+        offset = 0
+        while offset + self.EVENT_HEADER.size <= len(buf):
+            wd, mask, _, length = self.EVENT_HEADER.unpack_from(buf, offset)
+            offset += self.EVENT_HEADER.size
+            name = buf[offset:offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                # Events were dropped; fall back to a full reconcile
+                self._add_tree(self.index.root_dir)
+                self.index.scan()
+                return
+            if mask & (self.IN_DELETE_SELF | self.IN_IGNORED):
+                self._dirs.pop(wd, None)
+                continue
+
+            parent = self._dirs.get(wd)
+            if parent is None or not name:
+                continue
+            path = os.path.join(parent, os.fsdecode(name))
+
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # A folder moved in or created with files already inside
+                    self._add_tree(path)
+                    self._collect(path, paths)
+                elif mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                    self.index.remove_tree(path)
+            else:
+                paths.add(path)
+
+        if paths:
+            self.index.update_paths(sorted(paths))
+
+    @staticmethod
+    def _collect(root: str, paths: set):
+        for dirpath, _, filenames in os.walk(root):
+            for f in filenames:
+                paths.add(os.path.join(dirpath, f))
+
+class PollingWatcher(threading.Thread):
+    """Fallback watcher: stats directories only and rescans those whose mtime changed."""
+    INTERVAL = 5.0
+
+    def __init__(self, index: LibraryIndex):
+        super().__init__(daemon=True, name="library-poll")
+        self.index = index
+        self._stop_event = threading.Event()
+        self._dir_mtimes: Dict[str, float] = {}
+        for dirpath, _, _ in os.walk(index.root_dir):
+            self._dir_mtimes[dirpath] = self._mtime(dirpath)
+
+    def stop(self):
+        self._stop_event.set()
+
+    @staticmethod
+    def _mtime(path: str) -> Optional[float]:
+        try:
+            return os.stat(path).st_mtime
+        except OSError:
+            return None
+
+    def run(self):
+        while not self._stop_event.wait(self.INTERVAL):
+            for dirpath, old_mtime in list(self._dir_mtimes.items()):
+                mtime = self._mtime(dirpath)
+                if mtime == old_mtime:
+                    continue
+                if mtime is None:
+                    del self._dir_mtimes[dirpath]
+                    self.index.remove_tree(dirpath)
+                    continue
+                self._dir_mtimes[dirpath] = mtime
+                self._rescan_dir(dirpath)
+
+    def _rescan_dir(self, dirpath: str):
+        """Diffs one directory's entries against the index (non-recursive)."""
+        current = set()
+        try:
+            with os.scandir(dirpath) as it:
+                for entry in it:
+                    if entry.is_dir():
+                        if entry.path not in self._dir_mtimes:
+                            self._dir_mtimes[entry.path] = None # Picked up on the next pass
+                    else:
+                        current.add(entry.path)
+        except OSError:
+            return
+        known = {p for p in self.index.paths() if os.path.dirname(p) == dirpath}
+        self.index.update_paths(sorted(current | known))
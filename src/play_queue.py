@@ -0,0 +1,303 @@
+import random
+from array import array
+from operator import attrgetter
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+REPEAT_OFF = "off"
+REPEAT_ALL = "all"
+REPEAT_ONE = "one"
+
+# Change event kinds passed to subscribers as (kind, start, count)
+ADDED = "added"     # count tracks appended at position start
+REMOVED = "removed" # count tracks removed; later positions shifted
+MOVED = "moved"     # track order changed
+RESET = "reset"     # queue replaced or cleared
+CURRENT = "current" # current track changed to position start
+
+ChangeCallback = Callable[[str, int, int], None]
+
+_url = attrgetter("url")
+
+class Track:
+    """One queue entry. Slotted, so a 100k-track queue costs a third of the dict version."""
+    __slots__ = ("title", "url", "type")
+
+    def __init__(self, title: str, url: str, type: str):
+        self.title = title
+        self.url = url
+        self.type = type
+
+    def __repr__(self) -> str:
+        return f"Track({self.title!r}, {self.url!r}, {self.type!r})"
+
+class PlayQueue:
+    """
+    Ordered play queue with O(1) current-track lookup.
+
+    The current position is tracked directly and carried through removals and
+    moves. Shuffle is a compact permutation of positions (array of ints) laid
+    over the track list, so the tracks themselves are never copied or
+    reordered. A URL -> positions index is carried through every change, so
+    finding, removing or deduplicating tracks by URL never scans titles.
+    Subscribers receive (kind, start, count) change events; all
+    mutations are expected on one thread (the UI thread).
+    """
+    def __init__(self):
+        self._tracks: List[Track] = []
+        self._current_pos = -1
+        # URL index: URL -> position, plus all positions (ascending) of URLs queued more than once
+        self._positions: Dict[str, int] = {}
+        self._duplicates: Dict[str, List[int]] = {}
+        self._order: Optional[array] = None # Shuffled positions, None when shuffle is off
+        self._current_slot = -1 # Current track's slot in _order, -1 if unknown
+        self.repeat = REPEAT_OFF
+        # Bumped on every change other than an append, so derived data (filter
+        # indexes, snapshots) can extend itself on appends and rebuild otherwise
+        self.generation = 0
+        self._subscribers: List[ChangeCallback] = []
+
+    # --- Sequence access ---
+
+    def __len__(self) -> int:
+        return len(self._tracks)
+
+    def __getitem__(self, position: int) -> Track:
+        return self._tracks[position]
+
+    def __iter__(self) -> Iterator[Track]:
+        return iter(self._tracks)
+
+    def positions_of(self, url: str) -> List[int]:
+        """Positions of the tracks with this URL, ascending. O(1) through the URL index."""
+        if url in self._duplicates:
+            return list(self._duplicates[url])
+        position = self._positions.get(url)
+        return [] if position is None else [position]
+
+    def __contains__(self, url: str) -> bool:
+        return url in self._positions
+
+    # --- Current track ---
+
+    @property
+    def current(self) -> Optional[Track]:
+        return self._tracks[self._current_pos] if self._current_pos >= 0 else None
+
+    @property
+    def current_index(self) -> int:
+        return self._current_pos
+
+    def set_current(self, position: int):
+        if not 0 <= position < len(self._tracks):
+            position = -1
+        if position != self._current_pos:
+            self._current_pos = position
+            self._current_slot = -1
+            self._publish(CURRENT, position, 1)
+
+    def next_index(self, step: int = 1) -> int:
+        """Position *step* tracks after the current one in play order, or -1."""
+        n = len(self._tracks)
+        if not n:
+            return -1
+        if self.repeat == REPEAT_ONE and self._current_pos >= 0:
+            return self._current_pos
+        slot = self._current_pos if self._order is None else self._order_slot()
+        slot += step
+        if self.repeat == REPEAT_ALL:
+            slot %= n
+        elif not 0 <= slot < n:
+            return -1
+        return slot if self._order is None else self._order[slot]
+
+    def upcoming(self, count: int) -> List[int]:
+        """Positions of up to *count* tracks after the current one, in play order."""
+        result = []
+        for step in range(1, count + 1):
+            position = self.next_index(step)
+            if position < 0 or position in result or position == self._current_pos:
+                break
+            result.append(position)
+        return result
+
+    def advance(self, step: int = 1) -> bool:
+        """Moves the current track *step* places in play order. False at either end."""
+        position = self.next_index(step)
+        if position < 0:
+            return False
+        slot = self._order_slot() + step if self._order is not None else -1
+        self.set_current(position)
+        if self._order is not None and self.repeat != REPEAT_ONE:
+            self._current_slot = slot % len(self._order)
+        return True
+
+    # --- Mutations ---
+
+    def append(self, title: str, url: str, type: str) -> Track:
+        track = Track(title, url, type)
+        self.extend([track])
+        return track
+
+    def extend(self, tracks: Iterable[Track]):
+        start = len(self._tracks)
+        self._tracks.extend(tracks)
+        count = len(self._tracks) - start
+        if not count:
+            return
+        self._index_from(start)
+        if self._order is not None:
+            self._shuffle_in(range(start, start + count))
+        self._publish(ADDED, start, count)
+
+    def remove_where(self, predicate: Callable[[Track], bool], keep_current: bool = True) -> int:
+        """Removes matching tracks in one pass. Returns how many were removed."""
+        return self._remove({i for i, t in enumerate(self._tracks) if predicate(t)}, keep_current)
+
+    def remove_urls(self, urls: Iterable[str], keep_current: bool = True) -> int:
+        """Removes every track with one of *urls*, found through the URL index. Returns the count removed."""
+        return self._remove({i for url in urls for i in self.positions_of(url)}, keep_current)
+
+    def dedupe(self) -> int:
+        """Drops later duplicates of the same URL, keeping the current track. Returns the count removed."""
+        current = self.current
+        doomed = set()
+        for url, positions in self._duplicates.items():
+            keep = self._current_pos if current and current.url == url else positions[0]
+            doomed.update(i for i in positions if i != keep)
+        return self._remove(doomed, keep_current=True)
+
+    def move(self, src: int, dst: int):
+        """Moves the track at *src* so it ends up at position *dst*."""
+        track = self._tracks.pop(src)
+        self._tracks.insert(dst, track)
+        remap = array('l', range(len(self._tracks)))
+        if src < dst:
+            remap[src + 1:dst + 1] = array('l', range(src, dst))
+        else:
+            remap[dst:src] = array('l', range(dst + 1, src + 1))
+        remap[src] = dst
+        self._structure_changed(remap)
+        self._publish(MOVED, min(src, dst), abs(src - dst) + 1)
+
+    def replace(self, tracks: Iterable[Track]):
+        self._tracks = list(tracks)
+        self._structure_changed(None)
+        self._publish(RESET, 0, len(self._tracks))
+
+    def clear(self):
+        self.replace([])
+
+    # --- Orderings ---
+
+    @property
+    def shuffle(self) -> bool:
+        return self._order is not None
+
+    def set_shuffle(self, enabled: bool):
+        """Turns shuffle on (current track first, the rest in random order) or off."""
+        if enabled == self.shuffle:
+            return
+        if enabled:
+            self._build_order()
+        else:
+            self._order = None
+        self.generation += 1
+        self._publish(MOVED, 0, len(self._tracks))
+
+    def set_repeat(self, mode: str):
+        if mode not in (REPEAT_OFF, REPEAT_ALL, REPEAT_ONE):
+            raise ValueError(f"Unknown repeat mode: {mode}")
+        self.repeat = mode
+
+    # --- Events ---
+
+    def subscribe(self, callback: ChangeCallback):
+        self._subscribers.append(callback)
+
+    def _publish(self, kind: str, start: int, count: int):
+        for callback in self._subscribers:
+            callback(kind, start, count)
+
+    # --- Internals ---
+
+    def _remove(self, doomed: Set[int], keep_current: bool) -> int:
+        """Removes the tracks at positions *doomed* in one pass. Returns how many were removed."""
+        if keep_current:
+            doomed.discard(self._current_pos)
+        if not doomed:
+            return 0
+        kept = []
+        remap = array('l', [-1]) * len(self._tracks) # Old position -> new position, -1 if removed
+        for i, t in enumerate(self._tracks):
+            if i not in doomed:
+                remap[i] = len(kept)
+                kept.append(t)
+        self._tracks = kept
+        self._structure_changed(remap)
+        self._publish(REMOVED, 0, len(doomed))
+        return len(doomed)
+
+    def _structure_changed(self, remap: Optional[array]):
+        """Carries state over a change. *remap* maps old positions to new ones
+        (-1 if removed); None means the queue was replaced."""
+        self._reindex()
+        self.generation += 1
+        self._current_slot = -1
+        self._current_pos = remap[self._current_pos] if remap is not None and self._current_pos >= 0 else -1
+        if self._order is None:
+            return
+        if remap is None:
+            self._build_order()
+            return
+        # Same play order over the new positions, minus removed tracks
+        self._order = array('l', [q for q in map(remap.__getitem__, self._order) if q >= 0])
+
+    def _index_from(self, start: int):
+        """Adds the tracks from *start* on to the URL index."""
+        if len(self._tracks) - start > 16:
+            new = dict(zip(map(_url, self._tracks[start:]), range(start, len(self._tracks))))
+            if len(new) == len(self._tracks) - start and self._positions.keys().isdisjoint(new):
+                self._positions.update(new)
+                return
+        # A few tracks, or some URL is queued more than once
+        positions, duplicates = self._positions, self._duplicates
+        for i in range(start, len(self._tracks)):
+            url = self._tracks[i].url
+            if url not in positions:
+                positions[url] = i
+            elif url in duplicates:
+                duplicates[url].append(i)
+            else:
+                duplicates[url] = [positions[url], i]
+
+    def _reindex(self):
+        """Rebuilds the URL index after positions shifted (one C-level pass without duplicates)."""
+        self._positions = {}
+        self._duplicates = {}
+        self._index_from(0)
+
+    def _order_slot(self) -> int:
+        """Where the current track sits in the shuffled order (-1 if nowhere)."""
+        if self._current_slot < 0 and self._current_pos >= 0:
+            try:
+                self._current_slot = self._order.index(self._current_pos)
+            except ValueError:
+                pass
+        return self._current_slot
+
+    def _build_order(self):
+        current = self._current_pos
+        order = array('l', (i for i in range(len(self._tracks)) if i != current))
+        random.shuffle(order)
+        if current >= 0:
+            order.insert(0, current)
+        self._order = order
+        self._current_slot = 0 if current >= 0 else -1
+
+    def _shuffle_in(self, positions: Iterable[int]):
+        """Mixes new positions into the not-yet-played part of the shuffled order."""
+        first_free = self._order_slot() + 1
+        tail = self._order[first_free:]
+        tail.extend(positions)
+        random.shuffle(tail)
+        self._order[first_free:] = tail
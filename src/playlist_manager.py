@@ -1,67 +1,92 @@
+import hashlib
 import json
-import os
+import time
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Any, List, Dict, Optional, Tuple
 
 from .config import get_app_data_dir
+from .store import Store
+
+# Fields kept per cached playlist entry
+ENTRY_FIELDS = ("id", "title", "duration")
 
 class PlaylistManager:
-    def __init__(self, filename: str = "playlists.json"):
-        # Check current directory first
+    def __init__(self, store: Optional[Store] = None, filename: str = "playlists.json",
+                 cache_filename: str = "playlist_cache.json"):
+        self.store = store or Store()
+        if self.store.get_meta("playlists_migrated") is None:
+            self._migrate_json(filename, cache_filename)
+
+    def _migrate_json(self, filename: str, cache_filename: str):
+        """One-shot import of the old playlists.json (and playlist cache) into the store."""
+        # Same lookup order the JSON storage used: current directory first, then AppData
         local_path = Path(filename).resolve()
-        if local_path.exists():
-            self.filepath = local_path
-        else:
-            # Fallback to AppData
-            self.filepath = get_app_data_dir() / filename
-            self._ensure_file()
-
-    def _ensure_file(self):
-        # Only create if it doesn't exist (and we decided to use the AppData path)
-        if not self.filepath.exists():
-            try:
-                with open(self.filepath, 'w') as f:
-                    json.dump([], f)
-            except Exception as e:
-                print(f"Error creating playlist file: {e}")
+        json_path = local_path if local_path.exists() else get_app_data_dir() / filename
+        try:
+            with open(json_path, 'r') as f:
+                playlists = json.load(f)
+            for p in playlists:
+                self.store.upsert_playlist(p['name'], p['url'])
+        except (json.JSONDecodeError, FileNotFoundError, OSError, TypeError, KeyError):
+            pass
+
+        try:
+            with open(get_app_data_dir() / cache_filename, 'r') as f:
+                cache = json.load(f)
+            for url, entry in cache.items():
+                self.store.put_playlist_cache(url, entry['entries'], entry['hash'], entry['extracted_at'])
+        except (json.JSONDecodeError, FileNotFoundError, OSError, AttributeError, KeyError):
+            pass
+
+        self.store.set_meta("playlists_migrated", str(time.time()))
 
     def load_playlists(self) -> List[Dict[str, str]]:
         """Load all saved playlists. Returns list of {name, url}."""
-        try:
-            with open(self.filepath, 'r') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, FileNotFoundError, OSError):
-            return []
+        return self.store.list_playlists()
 
     def save_playlist(self, name: str, url: str) -> bool:
-        """Save a new playlist. Returns True if saved, False if updated existing."""
-        try:
-            playlists = self.load_playlists()
-            
-            # Check if exists, update if so
-            found = False
-            for p in playlists:
-                if p['name'] == name:
-                    p['url'] = url
-                    found = True
-                    break
-            
-            if not found:
-                playlists.append({"name": name, "url": url})
-                
-            with open(self.filepath, 'w') as f:
-                json.dump(playlists, f, indent=4)
-                
-            return found
-        except Exception as e:
-            # Re-raise to let the app handle it or log it, but at least don't silent fail
-            raise e
+        """Save a new playlist. Returns True if an existing one was updated."""
+        return self.store.upsert_playlist(name, url)
 
     def delete_playlist(self, name: str):
-        try:
-            playlists = self.load_playlists()
-            playlists = [p for p in playlists if p['name'] != name]
-            with open(self.filepath, 'w') as f:
-                json.dump(playlists, f, indent=4)
-        except Exception:
-            pass
+        """Deletes a playlist and, unless another playlist shares its URL, its cached entries."""
+        self.store.delete_playlist(name)
+
+    @staticmethod
+    def content_hash(entries: List[Dict[str, Any]]) -> str:
+        """Hash of the ordered video IDs, used to detect unchanged playlists."""
+        return hashlib.sha1("\n".join(e['id'] for e in entries).encode('utf-8')).hexdigest()
+
+    def get_cached_entries(self, url: str) -> Optional[List[Dict[str, Any]]]:
+        """Returns the cached entry list for a playlist URL, or None if never extracted."""
+        cached = self.store.get_playlist_cache(url)
+        return cached['entries'] if cached else None
+
+    def update_cached_entries(self, url: str, entries: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """
+        Stores a freshly extracted entry list.
+
+        Returns (added entries, removed IDs) relative to the previous cache,
+        both empty when the content hash is unchanged.
+        """
+        trimmed = [{k: e.get(k) for k in ENTRY_FIELDS} for e in entries if e.get('id')]
+        digest = self.content_hash(trimmed)
+        previous = self.store.get_playlist_cache(url)
+        if previous is not None and previous['hash'] == digest:
+            return [], [] # Unchanged; keep the stored rows and their original timestamp
+
+        self.store.put_playlist_cache(url, trimmed, digest, time.time())
+        if previous is None:
+            return [], []
+        old_ids = {e['id'] for e in previous['entries']}
+        new_ids = {e['id'] for e in trimmed}
+        added = [e for e in trimmed if e['id'] not in old_ids]
+        removed = [e['id'] for e in previous['entries'] if e['id'] not in new_ids]
+        return added, removed
+
+    def all_cached_entries(self) -> List[Dict[str, Any]]:
+        """Entries of every cached playlist, deduplicated by video ID."""
+        return self.store.all_playlist_entries()
+
+    def drop_cached_entries(self, url: str):
+        self.store.delete_playlist_cache(url)
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import List, Dict, Any, Optional
+
+from .config import get_app_data_dir
+from .text_index import tokenize
+
+# Only the fields the UI reads are persisted, keeping the cache file small
+RESULT_FIELDS = ("id", "title", "uploader", "channel", "duration", "duration_string", "url")
+
+class SearchCache:
+    """On-disk cache of search results with a TTL and LRU eviction."""
+    def __init__(self, filename: str = "search_cache.json", ttl: float = 6 * 3600, max_entries: int = 500):
+        self.filepath: Path = get_app_data_dir() / filename
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+        self._entries: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+
+        # Counters for measuring how much network time the cache saves
+        self.hits = 0
+        self.misses = 0
+        self.miss_seconds = 0.0
+        self._load()
+
+    @staticmethod
+    def make_key(query: str, limit: int) -> str:
+        """Normalizes case and whitespace so equivalent queries share an entry."""
+        return f"{limit}:{' '.join(query.casefold().split())}"
+
+    def get(self, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """Returns cached results, or None on a miss or expired entry."""
+        key = self.make_key(query, limit)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and time.time() - entry["ts"] < self.ttl:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry["results"]
+            if entry:
+                del self._entries[key]
+            self.misses += 1
+        return None
+
+    def get_prefix(self, query: str, limit: int) -> Optional[List[Dict[str, Any]]]:
+        """
+        Results cached for the longest shorter query that *query* extends,
+        narrowed to titles containing every word of *query* (as a prefix).
+
+        Used as provisional results while typing; not counted as a hit.
+        """
+        key = self.make_key(query, limit)
+        terms = tokenize(query)
+        if not terms:
+            return None
+        now = time.time()
+        with self._lock:
+            for end in range(len(key) - 1, len(f"{limit}:"), -1):
+                entry = self._entries.get(key[:end])
+                if entry and now - entry["ts"] < self.ttl:
+                    results = entry["results"]
+                    break
+            else:
+                return None
+        matches = []
+        for r in results:
+            tokens = tokenize(r.get("title") or "")
+            if all(any(t.startswith(term) for t in tokens) for term in terms):
+                matches.append(r)
+        return matches or None
+
+    def put(self, query: str, limit: int, results: List[Dict[str, Any]], elapsed: float = 0.0):
+        """Stores results for a query. *elapsed* is the network time the lookup cost."""
+        trimmed = [{k: r[k] for k in RESULT_FIELDS if r.get(k) is not None} for r in results]
+        with self._lock:
+            self.miss_seconds += elapsed
+            key = self.make_key(query, limit)
+            self._entries[key] = {"ts": time.time(), "results": trimmed}
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            snapshot = list(self._entries.items())
+        self._save(snapshot)
+
+    def all_results(self) -> List[Dict[str, Any]]:
+        """Returns every unexpired cached result once, for local indexing."""
+        now = time.time()
+        seen = {}
+        with self._lock:
+            for entry in self._entries.values():
+                if now - entry["ts"] < self.ttl:
+                    for r in entry["results"]:
+                        if r.get("id"):
+                            seen[r["id"]] = r
+        return list(seen.values())
+
+    def stats(self) -> Dict[str, Any]:
+        """Returns hit/miss counters and the estimated network time saved."""
+        with self._lock:
+            avg_miss = self.miss_seconds / self.misses if self.misses else 0.0
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._entries),
+                "seconds_saved": self.hits * avg_miss,
+            }
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+        self._save([])
+
+    def _load(self):
+        try:
+            with open(self.filepath, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, FileNotFoundError, OSError):
+            return
+
+        now = time.time()
+        try:
+            # Stored oldest-first, so insertion order restores the LRU order
+            for key, entry in data:
+                if now - entry.get("ts", 0) < self.ttl:
+                    self._entries[key] = entry
+        except (TypeError, ValueError, AttributeError):
+            self._entries.clear()
+
+    def _save(self, snapshot):
+        tmp_path = self.filepath.with_suffix(".tmp")
+        with self._save_lock:
+            try:
+                with open(tmp_path, 'w') as f:
+                    json.dump(snapshot, f)
+                os.replace(tmp_path, self.filepath)
+            except (OSError, TypeError, ValueError):
+                pass
@@ -0,0 +1,143 @@
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Callable, Dict, Iterator, List, Optional
+
+from .downloader import MusicDownloader
+
+class _TaskGroup:
+    """
+    Minimal stand-in for asyncio.TaskGroup (Python 3.11+).
+
+    Tasks created in the group are awaited when the block exits. If one fails
+    or the block is cancelled, the others are cancelled and the first error
+    propagates.
+    """
+    def __init__(self):
+        self._tasks: List[asyncio.Task] = []
+
+    def create_task(self, coro) -> asyncio.Task:
+        task = asyncio.ensure_future(coro)
+        self._tasks.append(task)
+        return task
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        if exc is not None:
+            self._cancel()
+        try:
+            while self._tasks:
+                done, _ = await asyncio.wait(self._tasks, return_when=asyncio.FIRST_EXCEPTION)
+                for task in done:
+                    self._tasks.remove(task)
+                    if not task.cancelled() and task.exception() is not None:
+                        self._cancel()
+                        await asyncio.gather(*self._tasks, return_exceptions=True)
+                        raise task.exception()
+        except asyncio.CancelledError:
+            self._cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            raise
+        return False
+
+    def _cancel(self):
+        for task in self._tasks:
+            task.cancel()
+
+TaskGroup = getattr(asyncio, "TaskGroup", _TaskGroup)
+
+class Services:
+    """
+    asyncio front for the blocking yt-dlp layer, awaited from Textual's event loop.
+
+    Blocking calls share one bounded thread pool instead of a thread per
+    operation. Awaiting them is cancellable: a cancelled call that has not
+    started yet never runs (and never holds a YoutubeDL instance); one already
+    running finishes in its thread and its result is dropped.
+    """
+    def __init__(self, downloader: MusicDownloader, max_workers: int = 4):
+        self.downloader = downloader
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="services")
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "cancelled": 0, "discarded": 0, "wasted": 0}
+
+    async def call(self, fn: Callable, *args, **kwargs) -> Any:
+        """Runs a blocking function on the pool and awaits its result."""
+        return await self._call(fn, args, kwargs, [False])
+
+    async def _call(self, fn: Callable, args, kwargs, started: List[bool]) -> Any:
+        """call(), with *started[0]* set once the function begins running."""
+        def run():
+            started[0] = True
+            return fn(*args, **kwargs)
+
+        self._count("calls")
+        future = asyncio.get_running_loop().run_in_executor(self._executor, run)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            # Cancelling the awaiting task also cancels a call still waiting for a thread
+            self._count("discarded" if started[0] else "cancelled")
+            raise
+
+    def iter_search(self, query: str, limit: int = 10, max_results: Optional[int] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Yields search results as they are parsed, past *limit* up to *max_results*."""
+        return self.iterate(self.downloader.iter_search(query, limit, max_results))
+
+    def iter_playlist(self, url: str) -> AsyncIterator[List[Dict[str, Any]]]:
+        """
+        Yields playlist pages; stopping early stops yt-dlp from requesting further pages.
+
+        Raises the extraction error after the pages fetched before it.
+        """
+        return self.iterate(self.downloader.iter_playlist(url, raise_errors=True))
+
+    async def iterate(self, items: Iterator) -> AsyncIterator:
+        """
+        Drives a blocking generator on the pool, one item per call.
+
+        Being cancelled while an extraction call is running counts as a wasted
+        extraction; closing between items (the consumer has what it needs,
+        e.g. one page of results) does not.
+        """
+        done = object()
+        try:
+            while True:
+                started = [False]
+                try:
+                    item = await self._call(next, (items, done), {}, started)
+                except asyncio.CancelledError:
+                    if started[0]:
+                        self._count("wasted")
+                    raise
+                if item is done:
+                    return
+                yield item
+        finally:
+            # Closing releases the generator's YoutubeDL checkout. Done on the
+            # pool, since closing can block on the extractor's connection.
+            try:
+                self._executor.submit(self._close_generator, items)
+            except RuntimeError:
+                pass # Shutting down
+
+    @staticmethod
+    def _close_generator(items):
+        try:
+            items.close()
+        except ValueError:
+            pass # A cancelled next() is still running; the generator closes once it is collected
+
+    def stats(self) -> Dict[str, int]:
+        """Blocking calls made, cancelled before they ran, run but discarded, and abandoned extractions."""
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def _count(self, key: str):
+        with self._stats_lock:
+            self._stats[key] += 1
+
+    def close(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
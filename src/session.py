@@ -0,0 +1,83 @@
+import threading
+from typing import List, Optional, Tuple
+
+from .play_queue import PlayQueue, Track
+from .store import Store
+
+class SessionSaver:
+    """
+    Keeps the play queue and playback position saved so a restart picks up where it left off.
+
+    snapshot() runs on the UI thread and only works out what changed since the
+    last one: appends become an incremental write of the new rows, anything
+    else (remove, move, replace) a full rewrite. The writes themselves happen
+    on a background thread; snapshots taken while one is pending are merged
+    into it, so a slow disk never backs up the UI.
+    """
+    def __init__(self, store: Store):
+        self.store = store
+        self._generation = None # Queue generation of the last snapshot
+        self._count = 0 # Rows covered by the last snapshot
+        self._cursor: Tuple[int, Optional[float]] = (-1, None)
+
+        self._cond = threading.Condition()
+        self._pending = None # [rows, start, replace, current_index, position] awaiting write
+        self._closing = False
+        self._writer = threading.Thread(target=self._run, daemon=True, name="session-writer")
+        self._writer.start()
+
+    def load(self) -> Tuple[List[Track], int, Optional[float]]:
+        """Returns (tracks, current_index, position) of the saved session. Blocking; call off the UI thread."""
+        rows, current_index, position = self.store.load_session()
+        tracks = [Track(title, url, type) for title, url, type in rows]
+        return tracks, current_index, position
+
+    def mark_restored(self, queue: PlayQueue):
+        """Records that *queue* now matches what is stored, so the next snapshot stays incremental."""
+        self._generation = queue.generation
+        self._count = len(queue)
+
+    def snapshot(self, queue: PlayQueue, position: Optional[float]):
+        """Schedules a write of whatever changed since the last snapshot."""
+        if position is not None:
+            position = round(position, 1)
+        cursor = (queue.current_index, position)
+        replace = queue.generation != self._generation or len(queue) < self._count
+        start = 0 if replace else self._count
+        if not replace and start == len(queue) and cursor == self._cursor:
+            return # Nothing new
+        rows = [(t.title, t.url, t.type) for t in queue[start:]] if len(queue) > start else []
+        self._generation = queue.generation
+        self._count = len(queue)
+        self._cursor = cursor
+
+        with self._cond:
+            pending = self._pending
+            if pending is None or replace:
+                self._pending = [rows, start, replace, *cursor]
+            else:
+                # Still unwritten: these rows continue the pending ones
+                pending[0].extend(rows)
+                pending[3:] = cursor
+            self._cond.notify()
+
+    def close(self):
+        """Writes any pending snapshot and stops the writer."""
+        with self._cond:
+            self._closing = True
+            self._cond.notify()
+        self._writer.join(timeout=5)
+
+    def _run(self):
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._closing or self._pending is not None)
+                pending, self._pending = self._pending, None
+                closing = self._closing
+            if pending is not None:
+                try:
+                    self.store.save_session(*pending)
+                except Exception:
+                    pass # Losing a snapshot only costs the resume point
+            if closing:
+                return
@@ -0,0 +1,283 @@
+import sqlite3
+import threading
+from contextlib import contextmanager
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from .config import get_app_data_dir
+
+SCHEMA_VERSION = 3
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS playlists (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL,
+    url TEXT NOT NULL
+);
+CREATE UNIQUE INDEX IF NOT EXISTS idx_playlists_name ON playlists(name);
+CREATE TABLE IF NOT EXISTS playlist_cache (
+    url TEXT PRIMARY KEY,
+    hash TEXT NOT NULL,
+    extracted_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS playlist_entries (
+    url TEXT NOT NULL REFERENCES playlist_cache(url) ON DELETE CASCADE,
+    position INTEGER NOT NULL,
+    video_id TEXT NOT NULL,
+    title TEXT,
+    duration REAL,
+    PRIMARY KEY (url, position)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS play_events (
+    id INTEGER PRIMARY KEY,
+    track_id TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    ended_at REAL NOT NULL,
+    position REAL,
+    end_reason TEXT
+);
+CREATE TABLE IF NOT EXISTS session_queue (
+    position INTEGER PRIMARY KEY,
+    title TEXT,
+    url TEXT NOT NULL,
+    type TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS download_jobs (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL,
+    title TEXT,
+    playlist_name TEXT,
+    video_id TEXT,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    added_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS library (
+    path TEXT PRIMARY KEY,
+    mtime REAL,
+    size INTEGER,
+    duration REAL,
+    title TEXT,
+    artist TEXT,
+    album TEXT
+) WITHOUT ROWID;
+"""
+
+LIBRARY_COLUMNS = ("mtime", "size", "duration", "title", "artist", "album")
+
+class Store:
+    """
+    SQLite database shared by playlists, playlist caches, play history, the
+    download journal, the saved session and the library index.
+
+    Runs in WAL mode so readers never block the writer. A single connection is
+    shared between threads behind a lock; every write goes through transaction(),
+    which commits atomically or rolls back.
+    """
+    def __init__(self, filename: str = "ytbeats.db"):
+        self.filepath = get_app_data_dir() / filename
+        self._lock = threading.RLock()
+        self._conn = sqlite3.connect(str(self.filepath), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL") # Durable at checkpoints, safe against corruption
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        with self.transaction() as conn:
+            conn.executescript(SCHEMA)
+            conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+
+    @contextmanager
+    def transaction(self) -> Iterator[sqlite3.Connection]:
+        """Runs a block of statements as one transaction."""
+        with self._lock:
+            try:
+                yield self._conn
+                self._conn.commit()
+            except BaseException:
+                self._conn.rollback()
+                raise
+
+    def query(self, sql: str, params: Iterable[Any] = ()) -> List[Tuple]:
+        with self._lock:
+            return self._conn.execute(sql, tuple(params)).fetchall()
+
+    def get_meta(self, key: str) -> Optional[str]:
+        rows = self.query("SELECT value FROM meta WHERE key = ?", (key,))
+        return rows[0][0] if rows else None
+
+    def set_meta(self, key: str, value: str):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", (key, value))
+
+    # --- Playlists ---
+
+    def list_playlists(self) -> List[Dict[str, str]]:
+        return [{"name": name, "url": url} for name, url in
+                self.query("SELECT name, url FROM playlists ORDER BY id")]
+
+    def upsert_playlist(self, name: str, url: str) -> bool:
+        """Inserts or updates a playlist by name. Returns True if it already existed."""
+        with self.transaction() as conn:
+            existed = conn.execute("SELECT 1 FROM playlists WHERE name = ?", (name,)).fetchone() is not None
+            conn.execute("INSERT INTO playlists(name, url) VALUES (?, ?) "
+                         "ON CONFLICT(name) DO UPDATE SET url = excluded.url", (name, url))
+        return existed
+
+    def delete_playlist(self, name: str) -> Optional[str]:
+        """Deletes a playlist by name. Returns its URL, or None if it did not exist."""
+        with self.transaction() as conn:
+            row = conn.execute("SELECT url FROM playlists WHERE name = ?", (name,)).fetchone()
+            if row is None:
+                return None
+            conn.execute("DELETE FROM playlists WHERE name = ?", (name,))
+            # Other playlists may point at the same URL and keep its cache
+            if conn.execute("SELECT 1 FROM playlists WHERE url = ?", (row[0],)).fetchone() is None:
+                conn.execute("DELETE FROM playlist_cache WHERE url = ?", (row[0],))
+        return row[0]
+
+    # --- Playlist content cache ---
+
+    def get_playlist_cache(self, url: str) -> Optional[Dict[str, Any]]:
+        """Returns {"hash", "extracted_at", "entries"} for a playlist URL, or None."""
+        with self._lock:
+            head = self._conn.execute("SELECT hash, extracted_at FROM playlist_cache WHERE url = ?",
+                                      (url,)).fetchone()
+            if head is None:
+                return None
+            rows = self._conn.execute("SELECT video_id, title, duration FROM playlist_entries "
+                                      "WHERE url = ? ORDER BY position", (url,)).fetchall()
+        return {
+            "hash": head[0],
+            "extracted_at": head[1],
+            "entries": [{"id": vid, "title": title, "duration": duration} for vid, title, duration in rows],
+        }
+
+    def put_playlist_cache(self, url: str, entries: List[Dict[str, Any]], digest: str, extracted_at: float):
+        with self.transaction() as conn:
+            conn.execute("INSERT OR REPLACE INTO playlist_cache(url, hash, extracted_at) VALUES (?, ?, ?)",
+                         (url, digest, extracted_at))
+            conn.execute("DELETE FROM playlist_entries WHERE url = ?", (url,))
+            conn.executemany("INSERT INTO playlist_entries(url, position, video_id, title, duration) "
+                             "VALUES (?, ?, ?, ?, ?)",
+                             [(url, i, e['id'], e.get('title'), e.get('duration')) for i, e in enumerate(entries)])
+
+    def all_playlist_entries(self) -> List[Dict[str, Any]]:
+        """Returns every cached playlist entry once, across all playlists."""
+        return [{"id": vid, "title": title, "duration": duration} for vid, title, duration in
+                self.query("SELECT video_id, title, MAX(duration) FROM playlist_entries GROUP BY video_id")]
+
+    def delete_playlist_cache(self, url: str):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM playlist_cache WHERE url = ?", (url,))
+
+    # --- Play history ---
+
+    def append_play_events(self, events: List[Tuple[str, float, float, Optional[float], Optional[str]]]):
+        """Appends (track_id, started_at, ended_at, position, end_reason) rows."""
+        with self.transaction() as conn:
+            conn.executemany("INSERT INTO play_events(track_id, started_at, ended_at, position, end_reason) "
+                             "VALUES (?, ?, ?, ?, ?)", events)
+
+    def iter_play_events(self, batch_size: int = 10000) -> Iterator[List[Tuple]]:
+        """Yields play events oldest first, in batches of (track_id, started_at, ended_at, position, end_reason)."""
+        last_id = 0
+        while True:
+            rows = self.query("SELECT id, track_id, started_at, ended_at, position, end_reason FROM play_events "
+                              "WHERE id > ? ORDER BY id LIMIT ?", (last_id, batch_size))
+            if not rows:
+                return
+            last_id = rows[-1][0]
+            yield [row[1:] for row in rows]
+
+    # --- Session ---
+
+    def save_session(self, rows: List[Tuple[str, str, str]], start: int, replace: bool,
+                     current_index: int, position: Optional[float]):
+        """
+        Writes queue rows (title, url, type) from position *start* on, plus the cursor.
+
+        *replace* drops every saved row first; otherwise only rows from *start*
+        on are rewritten, which is how appends are saved incrementally.
+        """
+        with self.transaction() as conn:
+            if replace:
+                conn.execute("DELETE FROM session_queue")
+            else:
+                conn.execute("DELETE FROM session_queue WHERE position >= ?", (start,))
+            conn.executemany("INSERT INTO session_queue(position, title, url, type) VALUES (?, ?, ?, ?)",
+                             [(start + i, *row) for i, row in enumerate(rows)])
+            conn.executemany("INSERT OR REPLACE INTO meta(key, value) VALUES (?, ?)", [
+                ("session_current", str(current_index)),
+                ("session_position", "" if position is None else repr(position)),
+            ])
+
+    def load_session(self) -> Tuple[List[Tuple[str, str, str]], int, Optional[float]]:
+        """Returns (rows, current_index, position) of the last saved session."""
+        rows = self.query("SELECT title, url, type FROM session_queue ORDER BY position")
+        try:
+            current_index = int(self.get_meta("session_current") or -1)
+        except ValueError:
+            current_index = -1
+        try:
+            position = float(self.get_meta("session_position") or "nan")
+        except ValueError:
+            position = float("nan")
+        return rows, current_index, None if position != position else position
+
+    # --- Download journal ---
+
+    def add_download_job(self, url: str, title: str, playlist_name: Optional[str],
+                         video_id: Optional[str], added_at: float) -> int:
+        """Journals a queued download. Returns its job id."""
+        with self.transaction() as conn:
+            return conn.execute("INSERT INTO download_jobs(url, title, playlist_name, video_id, added_at) "
+                                "VALUES (?, ?, ?, ?, ?)", (url, title, playlist_name, video_id, added_at)).lastrowid
+
+    def set_download_attempts(self, job_id: int, attempts: int):
+        with self.transaction() as conn:
+            conn.execute("UPDATE download_jobs SET attempts = ? WHERE id = ?", (attempts, job_id))
+
+    def delete_download_job(self, job_id: int):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM download_jobs WHERE id = ?", (job_id,))
+
+    def list_download_jobs(self) -> List[Dict[str, Any]]:
+        """Unfinished downloads in the order they were queued."""
+        return [{"id": job_id, "url": url, "title": title, "playlist_name": playlist_name,
+                 "video_id": video_id, "attempts": attempts}
+                for job_id, url, title, playlist_name, video_id, attempts in
+                self.query("SELECT id, url, title, playlist_name, video_id, attempts FROM download_jobs ORDER BY id")]
+
+    # --- Library metadata ---
+
+    def load_library(self) -> Dict[str, Dict[str, Any]]:
+        entries = {}
+        for row in self.query(f"SELECT path, {', '.join(LIBRARY_COLUMNS)} FROM library"):
+            entry = {"mtime": row[1], "size": row[2], "duration": row[3]}
+            for field, value in zip(LIBRARY_COLUMNS[3:], row[4:]):
+                if value is not None:
+                    entry[field] = value
+            entries[row[0]] = entry
+        return entries
+
+    def write_library(self, upserted: Dict[str, Dict[str, Any]], removed: Iterable[str]):
+        """Applies changed and removed library entries in one transaction."""
+        with self.transaction() as conn:
+            conn.executemany("DELETE FROM library WHERE path = ?", [(p,) for p in removed])
+            conn.executemany(
+                f"INSERT OR REPLACE INTO library(path, {', '.join(LIBRARY_COLUMNS)}) "
+                f"VALUES (?, {', '.join('?' for _ in LIBRARY_COLUMNS)})",
+                [(path, *(entry.get(c) for c in LIBRARY_COLUMNS)) for path, entry in upserted.items()])
+
+    def clear_library(self):
+        with self.transaction() as conn:
+            conn.execute("DELETE FROM library")
+
+    def close(self):
+        with self._lock:
+            try:
+                self._conn.execute("PRAGMA optimize")
+                self._conn.close()
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,157 @@
+import re
+import threading
+from bisect import bisect_left, insort
+from typing import Any, Dict, Hashable, Iterable, List, Optional, Set, Tuple
+
+TOKEN_RE = re.compile(r"\w+")
+
+def tokenize(text: str) -> List[str]:
+    """Splits text into casefolded word tokens."""
+    return TOKEN_RE.findall(text.casefold())
+
+def _deletes(token: str) -> Iterable[str]:
+    """All variants of *token* with one character removed."""
+    return {token[:i] + token[i + 1:] for i in range(len(token))}
+
+class TextIndex:
+    """
+    In-memory inverted index over short texts (track titles) keyed by any hashable.
+
+    Every query term matches as a prefix of a token, using a range scan over the
+    sorted vocabulary. A term with no prefix match falls back to tokens within
+    one edit (one-character deletion neighbourhoods, as in SymSpell). All terms
+    must match. Safe to query from the UI thread while another thread adds.
+    """
+    FUZZY_MIN_LEN = 4 # Shorter terms are too ambiguous to correct
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._docs: Dict[Hashable, Tuple[Tuple[str, ...], Any]] = {}
+        self._postings: Dict[str, Set[Hashable]] = {}
+        self._vocab: List[str] = [] # Sorted, for prefix range scans
+        self._neighbours: Dict[str, Set[str]] = {} # One-deletion variant -> tokens
+
+    def __len__(self) -> int:
+        return len(self._docs)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._docs
+
+    def add(self, key: Hashable, text: str, payload: Any = None):
+        """Indexes *text* under *key*, replacing any previous document with that key."""
+        tokens = tuple(set(tokenize(text)))
+        with self._lock:
+            if key in self._docs:
+                self._remove(key)
+            self._docs[key] = (tokens, payload)
+            for token in tokens:
+                postings = self._postings.get(token)
+                if postings is None:
+                    postings = self._postings[token] = set()
+                    insort(self._vocab, token)
+                    for variant in _deletes(token):
+                        self._neighbours.setdefault(variant, set()).add(token)
+                postings.add(key)
+
+    def remove(self, key: Hashable):
+        with self._lock:
+            if key in self._docs:
+                self._remove(key)
+
+    def payload(self, key: Hashable) -> Any:
+        doc = self._docs.get(key)
+        return doc[1] if doc else None
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+            self._postings.clear()
+            self._vocab.clear()
+            self._neighbours.clear()
+
+    def search(self, query: str) -> Set[Hashable]:
+        """Returns the keys of documents matching every term of *query*."""
+        terms = set(tokenize(query))
+        if not terms:
+            return set()
+        with self._lock:
+            # Vocabulary tokens each term stands for: its prefix range, else typo matches
+            matched = {}
+            fuzzy = set()
+            for term in terms:
+                tokens = self._prefix_tokens(term)
+                if not tokens:
+                    tokens = sorted(self._fuzzy_tokens(term))
+                    fuzzy.add(term)
+                if not tokens:
+                    return set()
+                matched[term] = tokens
+
+            # Start from the most selective term, then narrow its candidates.
+            # Terms with fewer tokens are estimated first so the cap kicks in early.
+            first, best = None, None
+            for term in sorted(matched, key=lambda t: len(matched[t])):
+                estimate = self._estimate(matched[term], best)
+                if best is None or estimate < best:
+                    first, best = term, estimate
+            result: Set[Hashable] = set()
+            for token in matched.pop(first):
+                result |= self._postings[token]
+
+            for term, tokens in matched.items():
+                if not result:
+                    break
+                if len(tokens) <= len(result):
+                    narrowed: Set[Hashable] = set()
+                    for token in tokens:
+                        narrowed |= result & self._postings[token]
+                    result = narrowed
+                elif term in fuzzy:
+                    wanted = set(tokens)
+                    result = {k for k in result if not wanted.isdisjoint(self._docs[k][0])}
+                else:
+                    # Few candidates left: check their own tokens instead
+                    result = {k for k in result if any(t.startswith(term) for t in self._docs[k][0])}
+            return result
+
+    def _prefix_tokens(self, term: str) -> List[str]:
+        lo = bisect_left(self._vocab, term)
+        hi = bisect_left(self._vocab, term[:-1] + chr(ord(term[-1]) + 1), lo)
+        return self._vocab[lo:hi]
+
+    def _estimate(self, tokens: List[str], cap: Optional[int] = None) -> int:
+        """Number of postings behind *tokens*, counted only up to *cap*."""
+        total = 0
+        for token in tokens:
+            total += len(self._postings[token])
+            if cap is not None and total >= cap:
+                break
+        return total
+
+    def _fuzzy_tokens(self, term: str) -> Set[str]:
+        """Typo fallback: tokens one insertion, deletion or substitution away."""
+        if len(term) < self.FUZZY_MIN_LEN:
+            return set()
+        candidates = set(self._neighbours.get(term, ()))
+        for variant in _deletes(term):
+            if variant in self._postings:
+                candidates.add(variant)
+            candidates |= self._neighbours.get(variant, set())
+        return candidates
+
+    def _remove(self, key: Hashable):
+        tokens, _ = self._docs.pop(key)
+        for token in tokens:
+            postings = self._postings[token]
+            postings.discard(key)
+            if postings:
+                continue
+            del self._postings[token]
+            i = bisect_left(self._vocab, token)
+            del self._vocab[i]
+            for variant in _deletes(token):
+                neighbours = self._neighbours.get(variant)
+                if neighbours is not None:
+                    neighbours.discard(token)
+                    if not neighbours:
+                        del self._neighbours[variant]
@@ -1,4 +1,15 @@
+import os
+from bisect import bisect_left
+from typing import Any, Optional, Sequence
+
+from rich.segment import Segment
 from textual.app import ComposeResult
+from textual.binding import Binding
+from textual.geometry import Region, Size
+from textual.message import Message
+from textual.reactive import reactive
+from textual.scroll_view import ScrollView
+from textual.strip import Strip
 from textual.widgets import Static, Input, Button, Label, ListItem, ListView, ProgressBar
 from textual.containers import Container, Horizontal, Vertical
 
@@ -18,6 +29,26 @@ class SearchResultItem(ListItem):
         yield Label(self.title, classes="result-title")
         yield Label(f"{self.uploader} - {self.duration}", classes="result-meta")
 
+class ResultsList(ListView):
+    """Search results list that asks for more once scrolled or moved near its end."""
+    LOAD_AHEAD = 3 # Rows (or lines) from the end at which NearEnd is posted
+
+    class NearEnd(Message):
+        """Posted when the view reaches the last few results."""
+        def __init__(self, results_list: "ResultsList"):
+            super().__init__()
+            self.results_list = results_list
+
+    def watch_scroll_y(self, old_value: float, new_value: float) -> None:
+        super().watch_scroll_y(old_value, new_value)
+        if new_value > old_value and new_value >= self.max_scroll_y - self.LOAD_AHEAD:
+            self.post_message(self.NearEnd(self))
+
+    def watch_index(self, old_index: Optional[int], new_index: Optional[int]) -> None:
+        super().watch_index(old_index, new_index)
+        if new_index is not None and new_index >= len(self) - self.LOAD_AHEAD:
+            self.post_message(self.NearEnd(self))
+
 class LibraryItem(ListItem):
     def __init__(self, title: str, path: str):
         super().__init__()
@@ -27,16 +58,262 @@ class LibraryItem(ListItem):
     def compose(self) -> ComposeResult:
         yield Label(self.title, classes="library-title")
 
-class QueueItem(ListItem):
-    def __init__(self, title: str, status: str, track_index: int):
-        super().__init__()
-        self.title = title
-        self.status = status
-        self.track_index = track_index
+class QueueView(ScrollView, can_focus=True):
+    """
+    Virtualized queue list. Rows are rendered straight from the track list
+    with the Line API, so only the visible rows cost anything to draw.
 
-    def compose(self) -> ComposeResult:
-        yield Label(self.title, classes="queue-title")
-        yield Label(self.status, classes="queue-status")
+    *tracks* is any sequence of objects with a ``title`` (the PlayQueue);
+    *rows* holds positions in it (all of them, or a filtered subset).
+    """
+    ROW_HEIGHT = 2 # Title line + status line
+
+    BINDINGS = [
+        Binding("enter", "select_cursor", "Select", show=False),
+        Binding("up", "cursor_up", "Cursor Up", show=False),
+        Binding("down", "cursor_down", "Cursor Down", show=False),
+        Binding("pageup", "page_up", "Page Up", show=False),
+        Binding("pagedown", "page_down", "Page Down", show=False),
+        Binding("home", "first", "First", show=False),
+        Binding("end", "last", "Last", show=False),
+    ]
+
+    COMPONENT_CLASSES = {
+        "queue-view--title",
+        "queue-view--status",
+        "queue-view--playing",
+        "queue-view--cursor",
+    }
+
+    cursor = reactive(0, always_update=True)
+
+    class Selected(Message):
+        """Posted when a row is chosen with Enter or a click."""
+        def __init__(self, queue_view: "QueueView", track_index: int):
+            super().__init__()
+            self.queue_view = queue_view
+            self.track_index = track_index
+
+    def __init__(self, *, id: Optional[str] = None, classes: Optional[str] = None):
+        super().__init__(id=id, classes=classes)
+        self._tracks: Sequence[Any] = []
+        self._rows: Sequence[int] = range(0)
+        self.current_index = -1
+
+    @property
+    def highlighted_track(self) -> Optional[int]:
+        """Index into the track list of the row under the cursor."""
+        if 0 <= self.cursor < len(self._rows):
+            return self._rows[self.cursor]
+        return None
+
+    def set_rows(self, tracks: Sequence[Any], rows: Sequence[int], changed: bool = False):
+        """
+        Points the view at a track list and the (filtered, ascending) rows to show.
+
+        Unless *changed* says positions now hold other tracks, unchanged rows
+        cost no redraw and the cursor stays on the same track when still shown.
+        """
+        same = tracks is self._tracks and not changed
+        if same and len(rows) == len(self._rows) and rows == self._rows:
+            return
+        highlighted = self.highlighted_track if same else None
+        self._tracks = tracks
+        self._rows = rows
+        self.virtual_size = Size(0, len(rows) * self.ROW_HEIGHT)
+        if highlighted is not None:
+            pos = bisect_left(rows, highlighted)
+            if pos < len(rows) and rows[pos] == highlighted:
+                self.cursor = pos
+                return
+        self.cursor = min(self.cursor, max(len(rows) - 1, 0))
+        self.refresh()
+
+    def set_current(self, current_index: int):
+        """Updates which track is marked as playing. Only visible rows are redrawn."""
+        if current_index != self.current_index:
+            self.current_index = current_index
+            self.refresh()
+
+    def validate_cursor(self, cursor: int) -> int:
+        return max(0, min(cursor, len(self._rows) - 1))
+
+    def watch_cursor(self, cursor: int):
+        self.scroll_to_region(
+            Region(0, cursor * self.ROW_HEIGHT, max(self.size.width, 1), self.ROW_HEIGHT),
+            animate=False,
+        )
+        self.refresh()
+
+    def _status_of(self, track_index: int) -> str:
+        if track_index < self.current_index:
+            return "Finished"
+        if track_index == self.current_index:
+            return "Playing"
+        return "Pending"
+
+    def render_line(self, y: int) -> Strip:
+        width = self.size.width
+        base = self.rich_style
+        pos, sub = divmod(self.scroll_offset.y + y, self.ROW_HEIGHT)
+        if pos >= len(self._rows):
+            return Strip.blank(width, base)
+
+        track_index = self._rows[pos]
+        if sub == 0:
+            text = self._tracks[track_index].title
+            text_style = base + self.get_component_rich_style("queue-view--title")
+        else:
+            text = self._status_of(track_index)
+            text_style = base + self.get_component_rich_style("queue-view--status")
+
+        marker = " "
+        row_style = base
+        if pos == self.cursor:
+            marker = "▌"
+            row_style = base + self.get_component_rich_style("queue-view--cursor")
+        elif track_index == self.current_index:
+            marker = "▌"
+            row_style = base + self.get_component_rich_style("queue-view--playing")
+        if row_style is not base:
+            text_style = text_style + row_style
+
+        strip = Strip([Segment(marker, row_style), Segment(f"{text} ", text_style)])
+        return strip.crop(0, width).adjust_cell_length(width, row_style)
+
+    def on_click(self, event):
+        pos = (event.y + self.scroll_offset.y) // self.ROW_HEIGHT
+        if 0 <= pos < len(self._rows):
+            self.cursor = pos
+            self.action_select_cursor()
+
+    def action_select_cursor(self):
+        track_index = self.highlighted_track
+        if track_index is not None:
+            self.post_message(self.Selected(self, track_index))
+
+    def action_cursor_up(self):
+        self.cursor -= 1
+
+    def action_cursor_down(self):
+        self.cursor += 1
+
+    def action_page_up(self):
+        self.cursor -= max(1, self.size.height // self.ROW_HEIGHT)
+
+    def action_page_down(self):
+        self.cursor += max(1, self.size.height // self.ROW_HEIGHT)
+
+    def action_first(self):
+        self.cursor = 0
+
+    def action_last(self):
+        self.cursor = len(self._rows) - 1
+
+class LibraryView(ScrollView, can_focus=True):
+    """
+    Virtualized library list: one row per file, rendered straight from the
+    sorted path list with the Line API, so a large library mounts nothing.
+    """
+    BINDINGS = QueueView.BINDINGS
+
+    COMPONENT_CLASSES = {
+        "library-view--title",
+        "library-view--cursor",
+    }
+
+    cursor = reactive(0, always_update=True)
+
+    class Selected(Message):
+        """Posted when a file is chosen with Enter or a click."""
+        def __init__(self, library_view: "LibraryView", title: str, path: str):
+            super().__init__()
+            self.library_view = library_view
+            self.title = title
+            self.path = path
+
+    def __init__(self, root_dir: str, *, id: Optional[str] = None, classes: Optional[str] = None):
+        super().__init__(id=id, classes=classes)
+        self.root_dir = root_dir
+        self.paths: Sequence[str] = []
+
+    def title_of(self, path: str) -> str:
+        return os.path.relpath(path, self.root_dir)
+
+    @property
+    def highlighted_path(self) -> Optional[str]:
+        if 0 <= self.cursor < len(self.paths):
+            return self.paths[self.cursor]
+        return None
+
+    def set_paths(self, paths: Sequence[str]):
+        """Shows the sorted *paths*, keeping the cursor on the same file when still listed."""
+        if paths == self.paths:
+            return
+        highlighted = self.highlighted_path
+        self.paths = paths
+        self.virtual_size = Size(0, len(paths))
+        if highlighted is not None:
+            pos = bisect_left(paths, highlighted)
+            if pos < len(paths) and paths[pos] == highlighted:
+                self.cursor = pos
+                return
+        self.cursor = min(self.cursor, max(len(paths) - 1, 0))
+        self.refresh()
+
+    def validate_cursor(self, cursor: int) -> int:
+        return max(0, min(cursor, len(self.paths) - 1))
+
+    def watch_cursor(self, cursor: int):
+        self.scroll_to_region(Region(0, cursor, max(self.size.width, 1), 1), animate=False)
+        self.refresh()
+
+    def render_line(self, y: int) -> Strip:
+        width = self.size.width
+        base = self.rich_style
+        pos = self.scroll_offset.y + y
+        if pos >= len(self.paths):
+            return Strip.blank(width, base)
+
+        marker = " "
+        row_style = base
+        text_style = base + self.get_component_rich_style("library-view--title")
+        if pos == self.cursor:
+            marker = "▌"
+            row_style = base + self.get_component_rich_style("library-view--cursor")
+            text_style = text_style + row_style
+
+        strip = Strip([Segment(marker, row_style), Segment(f"{self.title_of(self.paths[pos])} ", text_style)])
+        return strip.crop(0, width).adjust_cell_length(width, row_style)
+
+    def on_click(self, event):
+        pos = event.y + self.scroll_offset.y
+        if 0 <= pos < len(self.paths):
+            self.cursor = pos
+            self.action_select_cursor()
+
+    def action_select_cursor(self):
+        path = self.highlighted_path
+        if path is not None:
+            self.post_message(self.Selected(self, self.title_of(path), path))
+
+    def action_cursor_up(self):
+        self.cursor -= 1
+
+    def action_cursor_down(self):
+        self.cursor += 1
+
+    def action_page_up(self):
+        self.cursor -= max(1, self.size.height)
+
+    def action_page_down(self):
+        self.cursor += max(1, self.size.height)
+
+    def action_first(self):
+        self.cursor = 0
+
+    def action_last(self):
+        self.cursor = len(self.paths) - 1
 
 class PlayerControls(Container):
     def compose(self) -> ComposeResult:
@@ -0,0 +1,187 @@
+import threading
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+import yt_dlp
+
+def _backoff(attempt: int) -> float:
+    """Exponential backoff between yt-dlp's own HTTP/fragment retries: 1s, 2s, 4s ... capped at 30s."""
+    return min(30.0, 2.0 ** attempt)
+
+# Option profiles, one pool of YoutubeDL instances per profile
+PROFILES: Dict[str, Dict[str, Any]] = {
+    "search": {
+        'format': 'bestaudio/best',
+        'quiet': True,
+        'noplaylist': True,
+        'default_search': 'ytsearch',
+        'extract_flat': True,
+    },
+    "flat-playlist": {
+        'extract_flat': True,
+        'quiet': True,
+        'ignoreerrors': True,
+    },
+    "stream-resolve": {
+        'format': 'bestaudio/best',
+        'quiet': True,
+    },
+    "download": {
+        'format': 'bestaudio/best',
+        'outtmpl': '%(title)s_[%(id)s].%(ext)s',
+        'quiet': True,
+        # Stable names plus .part files: an interrupted download (even across
+        # restarts) continues with a Range request from the bytes on disk
+        'continuedl': True,
+        'nopart': False,
+        'http_chunk_size': 10 * 1024 * 1024,
+        'retries': 10,
+        'fragment_retries': 10,
+        'retry_sleep_functions': {'http': _backoff, 'fragment': _backoff},
+    },
+}
+
+class _ProgressRelay:
+    """Progress hook installed once per instance, forwarding to the current borrower."""
+    def __init__(self):
+        self.target: Optional[Callable[[Dict[str, Any]], None]] = None
+
+    def __call__(self, d: Dict[str, Any]):
+        if self.target:
+            self.target(d)
+
+class YDLPool:
+    """
+    Pool of long-lived YoutubeDL instances keyed by option profile.
+
+    Building a YoutubeDL pays for extractor setup and cookie/session
+    initialization; checking one out of the pool reuses an instance that
+    already did. Each instance is used by one thread at a time.
+    """
+    def __init__(self, profiles: Optional[Dict[str, Dict[str, Any]]] = None, max_per_profile: int = 4,
+                 factory: Callable[[Dict[str, Any]], Any] = yt_dlp.YoutubeDL):
+        self.profiles = profiles if profiles is not None else PROFILES
+        self.max_per_profile = max_per_profile
+        self.factory = factory
+        self._cond = threading.Condition()
+        self._idle: Dict[str, List[Any]] = {name: [] for name in self.profiles}
+        self._created: Dict[str, int] = {name: 0 for name in self.profiles}
+        self._relays: Dict[int, _ProgressRelay] = {}
+        self._closed = False
+
+    def prewarm(self, *profiles: str):
+        """Builds one idle instance for each given profile (all profiles by default)."""
+        for name in profiles or self.profiles:
+            with self._cond:
+                if self._idle[name] or self._created[name] >= self.max_per_profile:
+                    continue
+                self._created[name] += 1
+            try:
+                ydl = self._create(name)
+            except Exception:
+                with self._cond:
+                    self._created[name] -= 1
+                continue
+            with self._cond:
+                self._idle[name].append(ydl)
+                self._cond.notify()
+
+    @contextmanager
+    def checkout(self, profile: str, progress_hook: Optional[Callable[[Dict[str, Any]], None]] = None,
+                 **params) -> Iterator[Any]:
+        """
+        Borrows an instance for *profile*, blocking while all of them are in use.
+
+        *params* override the profile's options for this checkout only.
+        An instance that raised is discarded rather than returned to the pool.
+        A generator holding the checkout that is closed early (GeneratorExit)
+        did not fail, so its instance goes back to the pool.
+        """
+        ydl = self._acquire(profile)
+        missing = object()
+        saved = {key: ydl.params.get(key, missing) for key in params}
+        ydl.params.update(params)
+        relay = self._relays.get(id(ydl))
+        if relay:
+            relay.target = progress_hook
+
+        def give_back():
+            if relay:
+                relay.target = None
+            for key, value in saved.items():
+                if value is missing:
+                    ydl.params.pop(key, None)
+                else:
+                    ydl.params[key] = value
+            self._release(profile, ydl)
+
+        try:
+            yield ydl
+        except GeneratorExit:
+            give_back()
+            raise
+        except BaseException:
+            self._discard(profile, ydl)
+            raise
+        else:
+            give_back()
+
+    def close(self):
+        """Closes every idle instance. Checked-out instances are closed on return."""
+        with self._cond:
+            self._closed = True
+            idle = [ydl for instances in self._idle.values() for ydl in instances]
+            for instances in self._idle.values():
+                instances.clear()
+        for ydl in idle:
+            self._close_instance(ydl)
+
+    def _create(self, profile: str) -> Any:
+        opts = dict(self.profiles[profile])
+        relay = _ProgressRelay()
+        opts['progress_hooks'] = [relay]
+        ydl = self.factory(opts)
+        self._relays[id(ydl)] = relay
+        return ydl
+
+    def _acquire(self, profile: str) -> Any:
+        if profile not in self.profiles:
+            raise KeyError(f"Unknown YoutubeDL profile: {profile}")
+
+        with self._cond:
+            while True:
+                if self._idle[profile]:
+                    return self._idle[profile].pop()
+                if self._created[profile] < self.max_per_profile:
+                    self._created[profile] += 1
+                    break
+                self._cond.wait()
+
+        try:
+            return self._create(profile)
+        except BaseException:
+            with self._cond:
+                self._created[profile] -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, profile: str, ydl: Any):
+        with self._cond:
+            if not self._closed:
+                self._idle[profile].append(ydl)
+                self._cond.notify()
+                return
+        self._discard(profile, ydl)
+
+    def _discard(self, profile: str, ydl: Any):
+        with self._cond:
+            self._created[profile] -= 1
+            self._cond.notify()
+        self._close_instance(ydl)
+
+    def _close_instance(self, ydl: Any):
+        self._relays.pop(id(ydl), None)
+        try:
+            ydl.close()
+        except Exception:
+            pass